@@ -0,0 +1,122 @@
+import json
+import subprocess
+import sys
+import pandas as pd
+from numba import types
+
+class Compilacion():
+    """
+    Clase con los tipos de los kernels de Numba del proyecto y el paso de precompilación.
+
+    Todos los kernels se declaran con firmas explícitas y cache=True. Con las firmas, Numba los
+    compila al importar su módulo y no al primer llamado; con cache=True, el código de máquina
+    se guarda en __pycache__ y los procesos siguientes lo cargan del disco. El arranque en frío,
+    sin la copia en disco, compila todas las firmas y tarda unos 37 s en total; con la copia, 
+    importar todos los módulos tarda unos 5 s.
+    Los arreglos de entrada se declaran de solo lectura y con cualquier orden en memoria, porque
+    ese tipo también acepta arreglos modificables, contiguos o no.
+
+    Attributes
+    ----------
+    MATRIZ : numba.types.Array
+        Matriz de float64 de solo lectura
+    VECTOR : numba.types.Array
+        Vector de float64 de solo lectura
+    MATRIZ32 : numba.types.Array
+        Matriz de float32 de solo lectura
+    MATRIZ_C : numba.types.Array
+        Matriz de float64 de solo lectura y contigua por filas, para los kernels que la recorren
+        muchas veces; con el orden conocido Numba puede vectorizar el ciclo por columnas
+    MATRIZ32_C : numba.types.Array
+        Matriz de float32 de solo lectura y contigua por filas
+    VECTOR32 : numba.types.Array
+        Vector de float32 de solo lectura
+    ENTEROS : numba.types.Array
+        Vector de int64 de solo lectura
+    KERNELS : dict
+        Módulos del proyecto con kernels y el nombre de cada kernel
+
+    Methods
+    -------
+    precompilar(modulos=None)
+        Importa cada módulo con kernels en un proceso nuevo y mide cuánto tarda en compilarlos o 
+        cargarlos de la copia en disco.
+    """
+
+    MATRIZ = types.Array(types.float64, 2, 'A', readonly=True)
+    VECTOR = types.Array(types.float64, 1, 'A', readonly=True)
+    MATRIZ32 = types.Array(types.float32, 2, 'A', readonly=True)
+    VECTOR32 = types.Array(types.float32, 1, 'A', readonly=True)
+    MATRIZ_C = types.Array(types.float64, 2, 'C', readonly=True)
+    MATRIZ32_C = types.Array(types.float32, 2, 'C', readonly=True)
+    ENTEROS = types.Array(types.int64, 1, 'A', readonly=True)
+
+    # Código que corre precompilar en cada proceso nuevo: importa el módulo, mide el tiempo y 
+    # devuelve, por kernel, las firmas y cuántas se cargaron de la copia en disco
+    __MEDICION = """
+import json, sys, time, importlib
+sys.path[:0] = json.loads(sys.argv[1])
+inicio = time.perf_counter()
+modulo = importlib.import_module(sys.argv[2])
+tiempo = time.perf_counter() - inicio
+kernels = {}
+for ruta in json.loads(sys.argv[3]):
+    kernel = modulo
+    for parte in ruta.split('.'):
+        kernel = getattr(kernel, parte)
+    kernels[ruta] = (len(kernel.signatures), sum(kernel.stats.cache_hits.values()))
+print(json.dumps({'tiempo' : tiempo, 'kernels' : kernels}))
+"""
+
+    KERNELS = {
+        'ModeloEstocastico' : ['ModeloEstocastico._simular_primas_numba'],
+        'OperacionesBasicas' : ['OperacionesBasicas.operacion', 'OperacionesBasicas._producto_acumulado'],
+        'RegresionLogistica' : ['_sigmoide', '_gradiente_perdida', '_gradiente_perdida_paralelo',
+                                '_optimizar', '_optimizar_paralelo', '_gradiente_hessiana', '_predecir',
+                                '_probabilidades', '_perdida', '_epoca_minilotes', '_validar_configuracion',
+                                '_regresion_logistica'],
+        'TrabajoDataframes' : ['TrabajoDataframes._promedio_movil_numba']
+    }
+
+    @staticmethod
+    def precompilar(modulos=None):
+        """
+        Importa cada módulo con kernels en un proceso nuevo y mide cuánto tarda en compilarlos o 
+        cargarlos de la copia en disco.
+
+        Sirve para llenar la copia en disco antes de usar el proyecto, por ejemplo al instalarlo,
+        o para medir el arranque de un proceso nuevo. Se usa un proceso nuevo porque en el 
+        actual los módulos suelen estar ya importados y su importación no tarda nada. El tiempo
+        incluye los módulos de los que depende cada uno; sin la copia en disco, la primera vez, 
+        puede tardar decenas de segundos.
+
+        Parameters
+        ----------
+        modulos : list, optional
+            Nombres de los módulos. Por defecto todos los de KERNELS
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            DataFrame con cada kernel, sus firmas, cuántas se cargaron de la copia en disco, si 
+            todas se cargaron de ahí y el tiempo de importación de su módulo en el proceso nuevo
+        """
+        filas = []
+        for nombre in modulos or Compilacion.KERNELS:
+            resultado = subprocess.run([sys.executable, '-c', Compilacion.__MEDICION, json.dumps(sys.path), nombre,
+                                        json.dumps(Compilacion.KERNELS[nombre])],
+                                       capture_output=True, text=True, check=True)
+            medicion = json.loads(resultado.stdout.splitlines()[-1])
+
+            for ruta, (firmas, aciertos) in medicion['kernels'].items():
+                filas.append({
+                    'modulo' : nombre,
+                    'kernel' : ruta,
+                    'firmas' : firmas,
+                    'cargadas' : aciertos,
+                    'desde_cache' : aciertos == firmas,
+                    'tiempo' : medicion['tiempo']
+                })
+
+        df = pd.DataFrame(filas)
+        return df
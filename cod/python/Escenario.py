@@ -0,0 +1,455 @@
+import itertools
+
+class Escenario():
+    """
+    Clase con los supuestos económicos y demográficos de un cálculo de primas.
+
+    Attributes
+    ----------
+    interes : float
+        Tasa de interés real anual. Por defecto es 0.04
+    inflacion : float
+        Tasa de inflación anual. Por defecto es 0.03
+    beneficio_muerte : float
+        Monto que se paga si la persona muere antes de la edad de retiro. Por defecto es 5_000_000
+    pension_mensual : float
+        Monto de cada pago de la pensión. Por defecto es 300_000
+    pagos_anuales : int
+        Cantidad de pagos de la pensión por año. Por defecto es 13
+    beneficio_funeral : float
+        Monto que se paga si la persona muere pensionada. Por defecto es 1_000_000
+    edad_minima : int
+        Menor edad de entrada de la cohorte. Por defecto es 20
+    edad_maxima : int
+        Mayor edad de entrada de la cohorte. Por defecto es 64
+    edad_retiro : int
+        Edad a la que se empieza a pagar la pensión. Por defecto es 65
+    anno_inicial : int
+        Año de la tabla de mortalidad en que inicia la proyección. Por defecto es 2024
+
+    Methods
+    -------
+    tasa_descuento()
+        Calcula la tasa con la que se descuentan los flujos.
+    rejilla(**valores)
+        Crea la lista de escenarios de todas las combinaciones de los valores dados.
+    """
+
+    def __init__(self, interes=0.04, inflacion=0.03, beneficio_muerte=5_000_000, pension_mensual=300_000,
+                 pagos_anuales=13, beneficio_funeral=1_000_000, edad_minima=20, edad_maxima=64,
+                 edad_retiro=65, anno_inicial=2024):
+        """
+        Constructor de la clase Escenario
+
+        Parameters
+        ----------
+        interes : float, optional
+            Tasa de interés real anual. Por defecto es 0.04
+        inflacion : float, optional
+            Tasa de inflación anual. Por defecto es 0.03
+        beneficio_muerte : float, optional
+            Monto que se paga si la persona muere antes de la edad de retiro. Por defecto es 5_000_000
+        pension_mensual : float, optional
+            Monto de cada pago de la pensión. Por defecto es 300_000
+        pagos_anuales : int, optional
+            Cantidad de pagos de la pensión por año. Por defecto es 13
+        beneficio_funeral : float, optional
+            Monto que se paga si la persona muere pensionada. Por defecto es 1_000_000
+        edad_minima : int, optional
+            Menor edad de entrada de la cohorte. Por defecto es 20
+        edad_maxima : int, optional
+            Mayor edad de entrada de la cohorte. Por defecto es 64
+        edad_retiro : int, optional
+            Edad a la que se empieza a pagar la pensión. Por defecto es 65
+        anno_inicial : int, optional
+            Año de la tabla de mortalidad en que inicia la proyección. Por defecto es 2024
+
+        Returns
+        -------
+        None
+        """
+        self.__interes = interes
+        self.__inflacion = inflacion
+        self.__beneficio_muerte = beneficio_muerte
+        self.__pension_mensual = pension_mensual
+        self.__pagos_anuales = pagos_anuales
+        self.__beneficio_funeral = beneficio_funeral
+        self.__edad_minima = edad_minima
+        self.__edad_maxima = edad_maxima
+        self.__edad_retiro = edad_retiro
+        self.__anno_inicial = anno_inicial
+
+    @property
+    def interes(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        interes : float
+            Tasa de interés real anual
+        """
+        return self.__interes
+
+    @interes.setter
+    def interes(self, nuevo_interes):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nuevo_interes : float
+            Tasa de interés real anual
+        
+        Returns
+        -------
+        None
+        """
+        self.__interes = nuevo_interes
+
+    @property
+    def inflacion(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        inflacion : float
+            Tasa de inflación anual
+        """
+        return self.__inflacion
+
+    @inflacion.setter
+    def inflacion(self, nueva_inflacion):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nueva_inflacion : float
+            Tasa de inflación anual
+        
+        Returns
+        -------
+        None
+        """
+        self.__inflacion = nueva_inflacion
+
+    @property
+    def beneficio_muerte(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        beneficio_muerte : float
+            Monto que se paga por muerte antes del retiro
+        """
+        return self.__beneficio_muerte
+
+    @beneficio_muerte.setter
+    def beneficio_muerte(self, nuevo_beneficio_muerte):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nuevo_beneficio_muerte : float
+            Monto que se paga por muerte antes del retiro
+        
+        Returns
+        -------
+        None
+        """
+        self.__beneficio_muerte = nuevo_beneficio_muerte
+
+    @property
+    def pension_mensual(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        pension_mensual : float
+            Monto de cada pago de la pensión
+        """
+        return self.__pension_mensual
+
+    @pension_mensual.setter
+    def pension_mensual(self, nueva_pension_mensual):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nueva_pension_mensual : float
+            Monto de cada pago de la pensión
+        
+        Returns
+        -------
+        None
+        """
+        self.__pension_mensual = nueva_pension_mensual
+
+    @property
+    def pagos_anuales(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        pagos_anuales : int
+            Cantidad de pagos de la pensión por año
+        """
+        return self.__pagos_anuales
+
+    @pagos_anuales.setter
+    def pagos_anuales(self, nuevos_pagos_anuales):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nuevos_pagos_anuales : int
+            Cantidad de pagos de la pensión por año
+        
+        Returns
+        -------
+        None
+        """
+        self.__pagos_anuales = nuevos_pagos_anuales
+
+    @property
+    def beneficio_funeral(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        beneficio_funeral : float
+            Monto que se paga por muerte siendo pensionado
+        """
+        return self.__beneficio_funeral
+
+    @beneficio_funeral.setter
+    def beneficio_funeral(self, nuevo_beneficio_funeral):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nuevo_beneficio_funeral : float
+            Monto que se paga por muerte siendo pensionado
+        
+        Returns
+        -------
+        None
+        """
+        self.__beneficio_funeral = nuevo_beneficio_funeral
+
+    @property
+    def edad_minima(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        edad_minima : int
+            Menor edad de entrada de la cohorte
+        """
+        return self.__edad_minima
+
+    @edad_minima.setter
+    def edad_minima(self, nueva_edad_minima):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nueva_edad_minima : int
+            Menor edad de entrada de la cohorte
+        
+        Returns
+        -------
+        None
+        """
+        self.__edad_minima = nueva_edad_minima
+
+    @property
+    def edad_maxima(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        edad_maxima : int
+            Mayor edad de entrada de la cohorte
+        """
+        return self.__edad_maxima
+
+    @edad_maxima.setter
+    def edad_maxima(self, nueva_edad_maxima):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nueva_edad_maxima : int
+            Mayor edad de entrada de la cohorte
+        
+        Returns
+        -------
+        None
+        """
+        self.__edad_maxima = nueva_edad_maxima
+
+    @property
+    def edad_retiro(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        edad_retiro : int
+            Edad de retiro
+        """
+        return self.__edad_retiro
+
+    @edad_retiro.setter
+    def edad_retiro(self, nueva_edad_retiro):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nueva_edad_retiro : int
+            Edad de retiro
+        
+        Returns
+        -------
+        None
+        """
+        self.__edad_retiro = nueva_edad_retiro
+
+    @property
+    def anno_inicial(self):
+        """
+        Método get de la clase Escenario
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        anno_inicial : int
+            Año en que inicia la proyección
+        """
+        return self.__anno_inicial
+
+    @anno_inicial.setter
+    def anno_inicial(self, nuevo_anno_inicial):
+        """
+        Método set de la clase Escenario
+        
+        Parameters
+        ----------
+        nuevo_anno_inicial : int
+            Año en que inicia la proyección
+        
+        Returns
+        -------
+        None
+        """
+        self.__anno_inicial = nuevo_anno_inicial
+
+    def __str__(self):
+        """
+        Devuelve una cadena de texto que resume la clase Escenario.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        cadena : str
+            Texto explicativo que resume la clase Escenario
+        """
+        return (f'Interés: {self.__interes}, inflación: {self.__inflacion}\n'
+                f'Beneficios: {self.__beneficio_muerte}, {self.__pension_mensual} x {self.__pagos_anuales}, '
+                f'{self.__beneficio_funeral}\n'
+                f'Edades: {self.__edad_minima} a {self.__edad_maxima}, retiro a los {self.__edad_retiro}, '
+                f'desde {self.__anno_inicial}')
+
+    def tasa_descuento(self):
+        """
+        Calcula la tasa con la que se descuentan los flujos.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        j : float
+            Tasa que combina el interés real y la inflación
+        """
+        return ((1 + self.__interes) * (1 + self.__inflacion)) - 1
+
+    @staticmethod
+    def rejilla(**valores):
+        """
+        Crea la lista de escenarios de todas las combinaciones de los valores dados.
+
+        Parameters
+        ----------
+        **valores : list
+            Lista de valores para cada atributo que se quiere variar, por ejemplo
+            interes=[0.03, 0.04] o pension_mensual=[250_000, 300_000]
+
+        Returns
+        -------
+        escenarios : list
+            Lista de objetos Escenario, los atributos no dados toman su valor por defecto
+        """
+        nombres = list(valores.keys())
+        escenarios = [Escenario(**dict(zip(nombres, combinacion)))
+                      for combinacion in itertools.product(*valores.values())]
+        return escenarios
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+class EstimadorEnLinea():
+    """
+    Clase que acumula la media y la varianza de muestras vectoriales por lotes, sin guardarlas.
+
+    Los lotes se combinan con la fórmula de Chan para varianzas en paralelo, de modo que cada
+    actualización cuesta lo mismo sin importar cuántas muestras se hayan acumulado antes.
+    Opcionalmente guarda un reservorio acotado de muestras elegidas uniformemente al azar.
+
+    Attributes
+    ----------
+    n : int
+        Cantidad de muestras acumuladas
+    media : numpy.ndarray
+        Media de las muestras en cada posición
+    varianza : numpy.ndarray
+        Varianza muestral en cada posición
+    error_estandar : numpy.ndarray
+        Error estándar de la media en cada posición
+    reservorio : numpy.ndarray
+        Muestras guardadas en el reservorio, o None si no se usa
+
+    Methods
+    -------
+    actualizar(lote)
+        Incorpora un lote de muestras a las estadísticas acumuladas.
+    intervalo(nivel_confianza=0.95)
+        Calcula el intervalo de confianza de la media en cada posición.
+    semiancho_relativo(nivel_confianza=0.95)
+        Calcula el semiancho del intervalo de confianza relativo a la media.
+    resumen(nivel_confianza=0.95)
+        Devuelve un DataFrame con las estadísticas de cada posición.
+    """
+
+    def __init__(self, tamano_reservorio=0, semilla=None):
+        """
+        Constructor de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        tamano_reservorio : int, optional
+            Cantidad máxima de muestras que se guardan. Por defecto es 0, sin reservorio
+        semilla : int o numpy.random.Generator, optional
+            Semilla o generador para escoger las muestras del reservorio. Por defecto es None
+
+        Returns
+        -------
+        None
+        """
+        self.__n = 0
+        self.__media = None
+        self.__m2 = None
+        self.__tamano_reservorio = tamano_reservorio
+        self.__reservorio = None
+        self.__rng = np.random.default_rng(semilla)
+
+    @property
+    def n(self):
+        """
+        Método get de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        n : int
+            Cantidad de muestras acumuladas
+        """
+        return self.__n
+
+    @property
+    def media(self):
+        """
+        Método get de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        media : numpy.ndarray
+            Media de las muestras en cada posición
+        """
+        return self.__media
+
+    @property
+    def varianza(self):
+        """
+        Método get de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        varianza : numpy.ndarray
+            Varianza muestral en cada posición
+        """
+        return self.__m2 / max(self.__n - 1, 1)
+
+    @property
+    def error_estandar(self):
+        """
+        Método get de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        error_estandar : numpy.ndarray
+            Error estándar de la media en cada posición
+        """
+        return np.sqrt(self.varianza / max(self.__n, 1))
+
+    @property
+    def reservorio(self):
+        """
+        Método get de la clase EstimadorEnLinea
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        reservorio : numpy.ndarray
+            Muestras guardadas en el reservorio, o None si no se usa
+        """
+        return self.__reservorio
+
+    def __str__(self):
+        """
+        Devuelve una cadena de texto que resume la clase EstimadorEnLinea.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        cadena : str
+            Texto explicativo que resume la clase EstimadorEnLinea
+        """
+        return f'EstimadorEnLinea con {self.__n} muestras acumuladas'
+
+    def actualizar(self, lote):
+        """
+        Incorpora un lote de muestras a las estadísticas acumuladas.
+
+        Parameters
+        ----------
+        lote : numpy.ndarray
+            Matriz de m x d con m muestras nuevas
+
+        Returns
+        -------
+        None
+        """
+        lote = np.asarray(lote, dtype=float)
+        n_lote = lote.shape[0]
+        if n_lote == 0:
+            return
+
+        media_lote = np.mean(lote, axis=0)
+        m2_lote = np.sum((lote - media_lote) ** 2, axis=0)
+
+        if self.__n == 0:
+            self.__media = media_lote
+            self.__m2 = m2_lote
+        else:
+            # Combinación de Chan de dos conjuntos de estadísticas
+            total = self.__n + n_lote
+            delta = media_lote - self.__media
+            self.__media = self.__media + delta * n_lote / total
+            self.__m2 = self.__m2 + m2_lote + delta ** 2 * self.__n * n_lote / total
+
+        if self.__tamano_reservorio > 0:
+            self.__actualizar_reservorio(lote)
+
+        self.__n += n_lote
+
+    def __actualizar_reservorio(self, lote):
+        """
+        Actualiza el reservorio con el algoritmo R aplicado a todo el lote a la vez.
+
+        Parameters
+        ----------
+        lote : numpy.ndarray
+            Matriz de m x d con m muestras nuevas
+
+        Returns
+        -------
+        None
+        """
+        if self.__reservorio is None:
+            self.__reservorio = np.empty((0, lote.shape[1]))
+
+        # Primero se llena el reservorio con las muestras que falten
+        faltantes = self.__tamano_reservorio - self.__reservorio.shape[0]
+        if faltantes > 0:
+            self.__reservorio = np.concatenate((self.__reservorio, lote[:faltantes]))
+
+        # Cada muestra restante reemplaza una posición con probabilidad tamano / (indice + 1)
+        inicio = max(faltantes, 0)
+        indices = self.__n + np.arange(inicio, lote.shape[0])
+        posiciones = self.__rng.integers(0, indices + 1)
+        reemplazos = posiciones < self.__tamano_reservorio
+        self.__reservorio[posiciones[reemplazos]] = lote[inicio:][reemplazos]
+
+    def intervalo(self, nivel_confianza=0.95):
+        """
+        Calcula el intervalo de confianza de la media en cada posición.
+
+        Parameters
+        ----------
+        nivel_confianza : float, optional
+            Nivel de confianza del intervalo. Por defecto es 0.95
+
+        Returns
+        -------
+        limite_inferior : numpy.ndarray
+            Límite inferior del intervalo en cada posición
+        limite_superior : numpy.ndarray
+            Límite superior del intervalo en cada posición
+        """
+        semiancho = norm.ppf(0.5 + nivel_confianza / 2) * self.error_estandar
+        return self.__media - semiancho, self.__media + semiancho
+
+    def semiancho_relativo(self, nivel_confianza=0.95):
+        """
+        Calcula el semiancho del intervalo de confianza relativo a la media.
+
+        Parameters
+        ----------
+        nivel_confianza : float, optional
+            Nivel de confianza del intervalo. Por defecto es 0.95
+
+        Returns
+        -------
+        semiancho : numpy.ndarray
+            Semiancho del intervalo dividido entre el valor absoluto de la media
+        """
+        semiancho = norm.ppf(0.5 + nivel_confianza / 2) * self.error_estandar
+        return semiancho / np.abs(self.__media)
+
+    def resumen(self, nivel_confianza=0.95):
+        """
+        Devuelve un DataFrame con las estadísticas de cada posición.
+
+        Parameters
+        ----------
+        nivel_confianza : float, optional
+            Nivel de confianza del intervalo. Por defecto es 0.95
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            DataFrame con la media, desviación, error estándar y los límites del intervalo
+        """
+        limite_inferior, limite_superior = self.intervalo(nivel_confianza)
+        dic = {
+            'media' : self.__media,
+            'desviacion' : np.sqrt(self.varianza),
+            'error_estandar' : self.error_estandar,
+            'limite_inferior' : limite_inferior,
+            'limite_superior' : limite_superior
+        }
+        df = pd.DataFrame(dic)
+        return df
@@ -1,5 +1,16 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
 import timeit
+from PlanLimpieza import PlanLimpieza
 
 class Madre:
     """
@@ -19,18 +30,31 @@ class Madre:
         Función que lee el contenido de un archivo de texto y 
         devuelve su contenido como un string
     
-    leer_excel(self)
+    leer_excel(self, hoja=0, usecols=None, dtype=None, cache=True, filtros=None)
         Función que lee el contenido de un archivo de Excel y devuelve su 
         contendio en un Dataframe
     
+    leer_csv(self, usecols=None, dtype=None, cache=True, filtros=None)
+        Función que lee el contenido de un archivo csv y devuelve su 
+        contendio en un Dataframe
+    
     medir_tiempo(self, metodo_str)
         Función que mide el tiempo promedio por numero de repeticiones
         en la ejecución de un método de la clase
     
     transpuesta(self)
         Calcula la matriz transpuesta y devuelve el resultado
+
+    Las funciones de lectura guardan cada archivo leído en dos niveles: una copia en 
+    formato Arrow (Feather sin compresión) en la carpeta .cache junto al archivo, que se 
+    identifica por el hash del contenido y se lee con mapeo en memoria, y una memoria 
+    LRU dentro del proceso con los últimos archivos leídos, según su ruta y fecha de 
+    modificación.
     """
     
+    # Memoria LRU compartida por todos los objetos: (ruta, fecha, tamaño, opciones) -> contenido
+    __memoria = OrderedDict()
+    __max_memoria = 16
     
     def __init__(self, ruta):
         ''' Constructor de la clase Madre
@@ -134,6 +158,8 @@ class Madre:
         '''
         Esta función abre un archivo de texto en modo de lectura, 
         lee todo su contenido y lo retorna como una cadena de texto.
+        Si el archivo no ha cambiado desde la última lectura se devuelve el 
+        contenido guardado en memoria.
         
         Parameters
         ---------
@@ -144,43 +170,489 @@ class Madre:
         contenido: str
            Cadena de texto que contiene el contenido completo del archivo leído
         '''
-        with open(self.__ruta, 'r') as archivo:
-            contenido = archivo.read()
-            return contenido
+        clave = self.__clave_memoria('txt')
+        contenido = self.__buscar_memoria(clave)
+        if contenido is None:
+            with open(self.__ruta, 'r') as archivo:
+                contenido = archivo.read()
+            self.__guardar_memoria(clave, contenido)
+        return contenido
 
-    def leer_excel(self):
+    def leer_excel(self, hoja=0, usecols=None, dtype=None, cache=True, filtros=None):
         '''
         Esta función utiliza pandas para abrir un archivo de Excel en modo de lectura, 
         y carga su contenido en un DataFrame.
         
+        La primera vez se leen todas las hojas del libro y se guardan en la carpeta .cache,
+        así las lecturas siguientes de cualquier hoja no vuelven a procesar el Excel.
+        
         Parameters
         ---------
-        None
+        hoja : str o int, optional
+            Nombre o posición de la hoja. Por defecto es 0, la primera hoja
+        
+        usecols : list o function, optional
+            Columnas que se quieren leer, o función que indica si se lee cada columna. 
+            Las demás no se cargan; con una función la lectura no se guarda en la memoria 
+            del proceso. Por defecto se leen todas
+        
+        dtype : dict, optional
+            Tipo de dato de algunas columnas, por ejemplo {'provincia': 'category'}
+        
+        cache : bool, optional
+            Si es False se lee directamente el Excel, sin copias. Por defecto es True
+        
+        filtros : list, optional
+            Filtros de filas como tuplas (columna, operador, valor). Con la copia en disco se 
+            aplican en Arrow, antes de crear el DataFrame. Por defecto se leen todas las filas
         
         Returns:
         -------
         contenido: pandas.DataFrame
            DataFrame que contiene los datos del archivo Excel leído
         '''
-        contenido = pd.read_excel(self.__ruta, engine = 'openpyxl')
-        return contenido
+        if not cache:
+            lectura, extra = self.__columnas_lectura(usecols, filtros)
+            contenido = pd.read_excel(self.__ruta, sheet_name=hoja, usecols=lectura, dtype=dtype, engine = 'openpyxl')
+            return self.__filtrar(contenido, filtros).drop(columns=extra)
+        return self.__leer_tabular('excel', hoja, usecols, dtype, filtros)
     
-    def leer_csv(self): 
+    def leer_csv(self, usecols=None, dtype=None, cache=True, filtros=None): 
         '''
         Esta función utiliza pandas para abrir un archivo tipo csv en modo de lectura, 
         y carga su contenido en un DataFrame.
         
         Parameters
         ---------
-        None
+        usecols : list o function, optional
+            Columnas que se quieren leer, o función que indica si se lee cada columna. 
+            Las demás no se cargan; con una función la lectura no se guarda en la memoria 
+            del proceso. Por defecto se leen todas
+        
+        dtype : dict, optional
+            Tipo de dato de algunas columnas, por ejemplo {'Outcome': 'int8'}
+        
+        cache : bool, optional
+            Si es False se lee directamente el csv, sin copias. Por defecto es True
+        
+        filtros : list, optional
+            Filtros de filas como tuplas (columna, operador, valor). Con la copia en disco se 
+            aplican en Arrow, antes de crear el DataFrame. Por defecto se leen todas las filas
         
         Returns:
         -------
         contenido: pandas.DataFrame
            DataFrame que contiene los datos del archivo csv leído
         '''
-        contenido = pd.read_csv(self.__ruta)
-        return contenido
+        if not cache:
+            lectura, extra = self.__columnas_lectura(usecols, filtros)
+            contenido = pd.read_csv(self.__ruta, usecols=lectura, dtype=dtype)
+            return self.__filtrar(contenido, filtros).drop(columns=extra)
+        return self.__leer_tabular('csv', 0, usecols, dtype, filtros)
+
+    def __leer_tabular(self, formato, hoja, usecols, dtype, filtros):
+        '''
+        Lee una tabla desde la memoria del proceso, la copia en disco o el archivo original,
+        en ese orden.
+        
+        Parameters
+        ---------
+        formato : str
+            'excel' o 'csv'
+        
+        hoja : str o int
+            Nombre o posición de la hoja, solo para Excel
+        
+        usecols : list o function
+            Columnas que se quieren leer, o None para todas
+        
+        dtype : dict
+            Tipo de dato de algunas columnas, o None
+        
+        filtros : list
+            Filtros de filas (columna, operador, valor), o None para todas
+        
+        Returns:
+        -------
+        contenido: pandas.DataFrame
+           DataFrame con las columnas, filas y tipos pedidos
+        '''
+        # Una función de columnas es un objeto nuevo en cada llamada y nunca se volvería a 
+        # encontrar, así que esas lecturas usan la copia en disco pero no la memoria
+        memoria = not callable(usecols)
+        columnas = None if usecols is None or not memoria else tuple(usecols)
+        opciones = (hoja, columnas, 
+                    None if dtype is None else tuple(sorted((str(c), str(t)) for c, t in dtype.items())),
+                    None if not filtros else repr(filtros))
+        clave = self.__clave_memoria(formato, opciones)
+        contenido = self.__buscar_memoria(clave) if memoria else None
+        
+        if contenido is None:
+            directorio, indice = self.__indice_cache(formato)
+            if isinstance(hoja, int):
+                hoja = indice['hojas'][hoja]
+            if str(hoja) not in indice['tablas']:
+                raise ValueError(f"La hoja {hoja} no existe en {self.__ruta}")
+            contenido = self.__cargar_tabla(directorio, indice['tablas'][str(hoja)], usecols, dtype, filtros)
+            if not memoria:
+                return contenido
+            self.__guardar_memoria(clave, contenido)
+        
+        # Copia superficial: con Copy-on-Write (por defecto desde pandas 3) no se duplican los 
+        # datos leídos del mapeo en memoria, una columna solo se copia cuando el usuario la 
+        # modifica, y esos cambios nunca alteran la memoria
+        return contenido.copy(deep=False)
+
+    def __cargar_tabla(self, directorio, meta, usecols, dtype, filtros):
+        '''
+        Carga una tabla guardada en la carpeta .cache, leyendo solo las columnas pedidas.
+        
+        Parameters
+        ---------
+        directorio : str
+            Carpeta de la copia
+        
+        meta : dict
+            Descripción de la tabla en el índice de la copia
+        
+        usecols : list o function
+            Columnas que se quieren leer, o None para todas
+        
+        dtype : dict
+            Tipo de dato de algunas columnas, o None
+        
+        filtros : list
+            Filtros de filas (columna, operador, valor), o None para todas
+        
+        Returns:
+        -------
+        contenido: pandas.DataFrame
+           DataFrame con las columnas, filas y tipos pedidos
+        '''
+        columnas = meta['columnas']
+        nombres = dict(zip(columnas, meta['nombres']))
+        if usecols is None:
+            pedidas = columnas
+        elif callable(usecols):
+            pedidas = [c for c in columnas if usecols(c)]
+        else:
+            pedidas = [c for c in columnas if c in set(usecols)]
+        dtype = {} if dtype is None else dtype
+        ruta_tabla = os.path.join(directorio, meta['archivo'])
+        
+        if meta['formato'] == 'pickle':
+            contenido = self.__filtrar(pd.read_pickle(ruta_tabla), filtros)[pedidas]
+            return contenido.astype(dtype) if dtype else contenido
+        
+        # Lectura con mapeo en memoria: solo se tocan las columnas pedidas y las de los filtros
+        extra = list(dict.fromkeys(c for c, _, _ in filtros or [] if c not in pedidas and c in nombres))
+        tabla = feather.read_table(ruta_tabla, columns=[nombres[c] for c in pedidas + extra], memory_map=True)
+        if filtros:
+            # Las filas se filtran en Arrow y las que no cumplen nunca llegan a pandas
+            expresion = pq.filters_to_expression([(nombres[c], o, v) for c, o, v in filtros])
+            # Los nulos no cumplen '!=' ni 'not in', igual que en PlanLimpieza.mascara
+            for c in {c for c, o, _ in filtros if o in ('!=', 'not in')}:
+                expresion &= pc.field(nombres[c]).is_valid()
+            tabla = tabla.filter(expresion).select(list(range(len(pedidas))))
+        
+        # Las columnas categóricas se codifican en Arrow antes de pasar a pandas
+        for i, columna in enumerate(pedidas):
+            if str(dtype.get(columna, '')) == 'category':
+                tabla = tabla.set_column(i, tabla.column_names[i], pc.dictionary_encode(tabla.column(i)))
+        
+        contenido = tabla.to_pandas(split_blocks=True)
+        contenido.columns = pd.Index(pedidas) if pedidas else contenido.columns
+        for columna in contenido.select_dtypes(include = ['category']).columns:
+            # Arrow guarda las categorías en orden de aparición, pandas las ordena
+            try:
+                categorias = sorted(contenido[columna].cat.categories)
+                contenido[columna] = contenido[columna].cat.reorder_categories(categorias)
+            except TypeError:
+                pass
+        otros_tipos = {c: t for c, t in dtype.items() if c in contenido.columns and str(t) != 'category'}
+        return contenido.astype(otros_tipos) if otros_tipos else contenido
+
+    @staticmethod
+    def __columnas_lectura(usecols, filtros):
+        '''
+        Agrega a las columnas pedidas las que usan los filtros, para leerlas del archivo 
+        original y poder filtrar.
+        
+        Parameters
+        ---------
+        usecols : list o function
+            Columnas que se quieren leer, o None para todas
+        
+        filtros : list
+            Filtros de filas (columna, operador, valor), o None para todas
+        
+        Returns:
+        -------
+        lectura : list o function
+            Columnas que se leen del archivo
+        
+        extra : list
+            Columnas de los filtros que no se pidieron y se quitan después de filtrar
+        '''
+        columnas_filtro = list(dict.fromkeys(c for c, _, _ in filtros or []))
+        if usecols is None or not columnas_filtro:
+            return usecols, []
+        if callable(usecols):
+            return (lambda c: usecols(c) or c in columnas_filtro), [c for c in columnas_filtro if not usecols(c)]
+        extra = [c for c in columnas_filtro if c not in set(usecols)]
+        return list(usecols) + extra, extra
+
+    @staticmethod
+    def __filtrar(contenido, filtros):
+        '''
+        Aplica filtros de filas a un DataFrame ya cargado.
+        
+        Parameters
+        ---------
+        contenido : pandas.DataFrame
+            DataFrame completo
+        
+        filtros : list
+            Filtros de filas (columna, operador, valor), o None para todas
+        
+        Returns:
+        -------
+        contenido: pandas.DataFrame
+           DataFrame con las filas que cumplen todos los filtros
+        '''
+        if not filtros:
+            return contenido
+        return contenido[PlanLimpieza(filtros=filtros).mascara(contenido)].reset_index(drop=True)
+
+    def __indice_cache(self, formato):
+        '''
+        Devuelve el índice de la copia en disco del archivo, creando la copia si no existe o 
+        si el contenido del archivo cambió.
+        
+        Parameters
+        ---------
+        formato : str
+            'excel' o 'csv'
+        
+        Returns:
+        -------
+        directorio: str
+           Carpeta de la copia
+        
+        indice: dict
+           Índice con la fecha de modificación, el hash y la descripción de cada tabla
+        '''
+        directorio = os.path.join(os.path.dirname(os.path.abspath(self.__ruta)), '.cache')
+        ruta_indice = os.path.join(directorio, f'{os.path.basename(self.__ruta)}.json')
+        estado = os.stat(self.__ruta)
+        
+        indice = None
+        if os.path.exists(ruta_indice):
+            with open(ruta_indice, 'r') as archivo:
+                indice = json.load(archivo)
+        
+        if indice is not None and indice['formato'] == formato:
+            if indice['modificacion'] == estado.st_mtime_ns and indice['tamano'] == estado.st_size:
+                return directorio, indice
+            # Si solo cambió la fecha de modificación, el contenido sigue siendo válido
+            if indice['hash'] == self.__hash_archivo():
+                indice['modificacion'] = estado.st_mtime_ns
+                indice['tamano'] = estado.st_size
+                self.__escribir_json(ruta_indice, indice)
+                return directorio, indice
+        
+        # Se borran el índice y las tablas de la copia anterior; el índice primero, para que si 
+        # falla la nueva copia no quede un índice que apunte a tablas borradas
+        if indice is not None:
+            os.remove(ruta_indice)
+            for meta in indice['tablas'].values():
+                ruta_tabla = os.path.join(directorio, meta['archivo'])
+                if os.path.exists(ruta_tabla):
+                    os.remove(ruta_tabla)
+        
+        return directorio, self.__crear_cache(directorio, ruta_indice, formato, estado)
+
+    def __crear_cache(self, directorio, ruta_indice, formato, estado):
+        '''
+        Lee el archivo original una vez y guarda cada tabla en formato Arrow.
+        
+        Parameters
+        ---------
+        directorio : str
+            Carpeta de la copia
+        
+        ruta_indice : str
+            Ruta del índice de la copia
+        
+        formato : str
+            'excel' o 'csv'
+        
+        estado : os.stat_result
+            Estado del archivo original antes de leerlo
+        
+        Returns:
+        -------
+        indice: dict
+           Índice con la fecha de modificación, el hash y la descripción de cada tabla
+        '''
+        os.makedirs(directorio, exist_ok=True)
+        hash_archivo = self.__hash_archivo()
+        
+        if formato == 'excel':
+            tablas = pd.read_excel(self.__ruta, sheet_name=None, engine = 'openpyxl')
+        else:
+            tablas = {0: pd.read_csv(self.__ruta)}
+        
+        indice = {'formato' : formato, 'modificacion' : estado.st_mtime_ns, 'tamano' : estado.st_size,
+                  'hash' : hash_archivo, 'hojas' : [str(hoja) for hoja in tablas.keys()], 'tablas' : {}}
+        
+        for n_tabla, (hoja, tabla) in enumerate(tablas.items()):
+            nombres = [str(columna) for columna in tabla.columns]
+            archivo = f'{os.path.basename(self.__ruta)}_{hash_archivo[:16]}_{n_tabla}'
+            # Nombre único para que dos procesos que crean la copia a la vez no se pisen
+            descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+            os.close(descriptor)
+            
+            try:
+                arrow = pa.Table.from_pandas(tabla.set_axis(nombres, axis=1), preserve_index=False)
+                feather.write_feather(arrow, temporal, compression='uncompressed')
+                archivo, formato_tabla = f'{archivo}.feather', 'feather'
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                # Columnas con tipos mezclados que Arrow no puede representar
+                tabla.to_pickle(temporal)
+                archivo, formato_tabla = f'{archivo}.pkl', 'pickle'
+            os.replace(temporal, os.path.join(directorio, archivo))
+            
+            indice['tablas'][str(hoja)] = {
+                'archivo' : archivo,
+                'formato' : formato_tabla,
+                'columnas' : [self.__etiqueta(columna) for columna in tabla.columns],
+                'nombres' : nombres
+            }
+        
+        self.__escribir_json(ruta_indice, indice)
+        return indice
+
+    @staticmethod
+    def __etiqueta(columna):
+        '''
+        Convierte el nombre de una columna a un tipo que se pueda guardar en JSON.
+        
+        Parameters
+        ---------
+        columna : object
+            Nombre de la columna
+        
+        Returns:
+        -------
+        etiqueta : int o str
+            Nombre de la columna como entero o cadena de texto
+        '''
+        return int(columna) if isinstance(columna, (int, np.integer)) else str(columna)
+
+    @staticmethod
+    def __escribir_json(ruta_json, contenido):
+        '''
+        Escribe un archivo JSON de forma atómica.
+        
+        Parameters
+        ---------
+        ruta_json : str
+            Ruta del archivo
+        
+        contenido : dict
+            Contenido del archivo
+        
+        Returns:
+        -------
+        None
+        '''
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta_json), suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as archivo:
+            json.dump(contenido, archivo)
+        os.replace(temporal, ruta_json)
+
+    def __hash_archivo(self):
+        '''
+        Calcula el hash SHA-256 del contenido del archivo.
+        
+        Parameters
+        ---------
+        None
+        
+        Returns:
+        -------
+        hash : str
+            Hash del contenido del archivo en hexadecimal
+        '''
+        sha = hashlib.sha256()
+        with open(self.__ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(1 << 20), b''):
+                sha.update(bloque)
+        return sha.hexdigest()
+
+    def __clave_memoria(self, formato, opciones=None):
+        '''
+        Construye la llave de la memoria LRU con la ruta, la fecha de modificación y el
+        tamaño del archivo, de modo que un archivo modificado no se confunde con el anterior.
+        
+        Parameters
+        ---------
+        formato : str
+            Tipo de lectura
+        
+        opciones : tuple, optional
+            Opciones de la lectura, como la hoja o las columnas
+        
+        Returns:
+        -------
+        clave : tuple
+            Llave de la memoria
+        '''
+        estado = os.stat(self.__ruta)
+        return (os.path.abspath(self.__ruta), estado.st_mtime_ns, estado.st_size, formato, opciones)
+
+    def __buscar_memoria(self, clave):
+        '''
+        Busca un contenido en la memoria LRU y lo marca como el más reciente.
+        
+        Parameters
+        ---------
+        clave : tuple
+            Llave de la memoria
+        
+        Returns:
+        -------
+        contenido : object
+            Contenido guardado, o None si no está en memoria
+        '''
+        memoria = Madre.__memoria
+        if clave not in memoria:
+            return None
+        memoria.move_to_end(clave)
+        return memoria[clave]
+
+    def __guardar_memoria(self, clave, contenido):
+        '''
+        Guarda un contenido en la memoria LRU, descartando el menos reciente si está llena.
+        
+        Parameters
+        ---------
+        clave : tuple
+            Llave de la memoria
+        
+        contenido : object
+            Contenido a guardar
+        
+        Returns:
+        -------
+        None
+        '''
+        memoria = Madre.__memoria
+        memoria[clave] = contenido
+        memoria.move_to_end(clave)
+        while len(memoria) > Madre.__max_memoria:
+            memoria.popitem(last=False)
         
     def medir_tiempo(self, metodo_str):
         '''
@@ -3,6 +3,7 @@ import numexpr as ne
 import numba as nb
 from numba import njit
 from Madre import Madre
+from Compilacion import Compilacion
 
 class OperacionesBasicas(Madre):
     """
@@ -102,7 +103,7 @@ class OperacionesBasicas(Madre):
         return resultado
   
     @staticmethod
-    @njit(parallel=True)
+    @njit((Compilacion.MATRIZ,), parallel=True, cache=True)
     def operacion(matriz):
         """
         Realiza una operación en una matriz utilizando Numba.
@@ -155,7 +156,7 @@ class OperacionesBasicas(Madre):
         return np.cumprod(self.__lista)
 
     @staticmethod
-    @njit(parallel=True)
+    @njit([(Compilacion.ENTEROS,), (Compilacion.VECTOR,)], parallel=True, cache=True)
     def _producto_acumulado(array):
         """
         Calcula el producto acumulado de un array utilizando Numba.
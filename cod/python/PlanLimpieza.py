@@ -0,0 +1,267 @@
+import numpy as np
+import numexpr as ne
+
+class PlanLimpieza():
+    """
+    Clase que describe de forma declarativa las reglas de limpieza de un DataFrame: las columnas
+    que se eliminan, los filtros de filas, las recodificaciones y las categorías ordenadas.
+
+    El plan no modifica datos por sí mismo. Quien lee el archivo lo usa para no cargar las
+    columnas eliminadas ni las filas filtradas, y quien limpia aplica todos los filtros con
+    una sola máscara.
+
+    Attributes
+    ----------
+    eliminar : list
+        Columnas que se eliminan
+    filtros : list
+        Filtros de filas como tuplas (columna, operador, valor), con los operadores '==', '!=',
+        '<', '<=', '>', '>=', 'in' y 'not in'. Se conservan las filas que cumplen todos; un
+        valor nulo no cumple ningún filtro, ni siquiera '!=' ni 'not in', salvo 'in' con None
+    recodificaciones : list
+        Recodificaciones como tuplas (columna, regla), en el orden en que se aplican. La regla
+        es un diccionario de reemplazos de texto o una función que recibe cada valor
+    categorias : dict
+        Columnas que se convierten en categóricas ordenadas, con la lista de sus categorías
+
+    Methods
+    -------
+    usa_columna(columna)
+        Indica si la columna se necesita para aplicar el plan.
+    mascara(df)
+        Evalúa todos los filtros en una sola expresión y devuelve las filas que se conservan.
+    """
+
+    # Operadores de comparación y el método de pandas equivalente
+    __OPERADORES = {'==' : 'eq', '!=' : 'ne', '<' : 'lt', '<=' : 'le', '>' : 'gt', '>=' : 'ge'}
+
+    def __init__(self, eliminar=None, filtros=None, recodificaciones=None, categorias=None):
+        """
+        Constructor de la clase PlanLimpieza
+
+        Parameters
+        ----------
+        eliminar : list, optional
+            Columnas que se eliminan. Por defecto ninguna
+        filtros : list, optional
+            Tuplas (columna, operador, valor) que deben cumplir las filas. Por defecto ninguno
+        recodificaciones : list, optional
+            Tuplas (columna, regla) que se aplican en orden. Por defecto ninguna
+        categorias : dict, optional
+            Columnas categóricas ordenadas con sus categorías. Por defecto ninguna
+
+        Returns
+        -------
+        None
+        """
+        self.__eliminar = list(eliminar or [])
+        self.__filtros = list(filtros or [])
+        self.__recodificaciones = list(recodificaciones or [])
+        self.__categorias = dict(categorias or {})
+
+    @property
+    def eliminar(self):
+        """
+        Método get de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        eliminar : list
+            Columnas que se eliminan
+        """
+        return self.__eliminar
+
+    @eliminar.setter
+    def eliminar(self, nuevas_eliminar):
+        """
+        Método set de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        nuevas_eliminar : list
+            Columnas que se eliminan
+        
+        Returns
+        -------
+        None
+        """
+        self.__eliminar = list(nuevas_eliminar)
+
+    @property
+    def filtros(self):
+        """
+        Método get de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        filtros : list
+            Filtros de filas (columna, operador, valor)
+        """
+        return self.__filtros
+
+    @filtros.setter
+    def filtros(self, nuevos_filtros):
+        """
+        Método set de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        nuevos_filtros : list
+            Filtros de filas (columna, operador, valor)
+        
+        Returns
+        -------
+        None
+        """
+        self.__filtros = list(nuevos_filtros)
+
+    @property
+    def recodificaciones(self):
+        """
+        Método get de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        recodificaciones : list
+            Recodificaciones (columna, regla) en orden
+        """
+        return self.__recodificaciones
+
+    @recodificaciones.setter
+    def recodificaciones(self, nuevas_recodificaciones):
+        """
+        Método set de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        nuevas_recodificaciones : list
+            Recodificaciones (columna, regla) en orden
+        
+        Returns
+        -------
+        None
+        """
+        self.__recodificaciones = list(nuevas_recodificaciones)
+
+    @property
+    def categorias(self):
+        """
+        Método get de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        categorias : dict
+            Columnas categóricas ordenadas y sus categorías
+        """
+        return self.__categorias
+
+    @categorias.setter
+    def categorias(self, nuevas_categorias):
+        """
+        Método set de la clase PlanLimpieza
+        
+        Parameters
+        ----------
+        nuevas_categorias : dict
+            Columnas categóricas ordenadas y sus categorías
+        
+        Returns
+        -------
+        None
+        """
+        self.__categorias = dict(nuevas_categorias)
+
+    def __str__(self):
+        """
+        Devuelve una cadena de texto que resume la clase PlanLimpieza.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        cadena : str
+            Texto explicativo que resume la clase PlanLimpieza
+        """
+        filtros = ' y '.join(f'{c} {o} {v!r}' for c, o, v in self.__filtros) or 'ninguno'
+        return (f'Eliminar: {self.__eliminar}\nFiltros: {filtros}\n'
+                f'Recodificaciones: {[c for c, _ in self.__recodificaciones]}\n'
+                f'Categorías ordenadas: {list(self.__categorias)}')
+
+    def usa_columna(self, columna):
+        """
+        Indica si la columna se necesita para aplicar el plan. Sirve como usecols de los lectores.
+
+        Parameters
+        ----------
+        columna : str
+            Nombre de la columna
+
+        Returns
+        -------
+        usa : bool
+            False si la columna se elimina y ningún filtro la usa
+        """
+        return columna not in self.__eliminar or any(columna == c for c, _, _ in self.__filtros)
+
+    def mascara(self, df):
+        """
+        Evalúa todos los filtros en una sola expresión y devuelve las filas que se conservan.
+
+        Los filtros de comparación sobre columnas numéricas se combinan en una sola expresión
+        de numexpr, que recorre los datos una vez sin crear arreglos intermedios; los demás
+        se evalúan con pandas y se combinan con el resultado.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            DataFrame con las columnas de los filtros
+
+        Returns
+        -------
+        mascara : numpy.ndarray
+            Arreglo booleano con True en las filas que cumplen todos los filtros
+        """
+        terminos = []
+        variables = {}
+        mascara = np.ones(len(df), dtype = bool)
+
+        for i, (columna, operador, valor) in enumerate(self.__filtros):
+            serie = df[columna]
+            if operador in self.__OPERADORES and isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'iufb' \
+                    and np.isscalar(valor):
+                # c == c es falso en los NaN, así '!=' tampoco conserva los nulos
+                terminos.append(f'(c{i} {operador} v{i})' if operador != '!=' else f'(c{i} != v{i}) & (c{i} == c{i})')
+                variables[f'c{i}'] = serie.to_numpy()
+                variables[f'v{i}'] = valor
+            elif operador == 'in':
+                mascara &= serie.isin(valor).to_numpy()
+            elif operador == 'not in':
+                mascara &= ~serie.isin(valor).to_numpy() & serie.notna().to_numpy()
+            elif operador in self.__OPERADORES:
+                # Comparación de pandas, los nulos no cumplen el filtro
+                comparacion = getattr(serie, self.__OPERADORES[operador])(valor)
+                mascara &= comparacion.fillna(False).to_numpy(dtype = bool) & serie.notna().to_numpy()
+            else:
+                raise ValueError(f"Operador no soportado: {operador}")
+
+        if terminos:
+            mascara &= ne.evaluate(' & '.join(terminos), local_dict = variables)
+        return mascara
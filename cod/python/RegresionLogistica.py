@@ -1,9 +1,603 @@
 import numpy as np
 import pandas as pd
-from numba import jit
+import numba as nb
+from numba import njit, prange
+from scipy.optimize import minimize
 from sklearn.model_selection import train_test_split
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import os
+from multiprocessing import shared_memory
 import time
 from Madre import Madre
+from Compilacion import Compilacion
+
+# Los kernels de la regresión están a nivel de módulo, y no anidados dentro de un método, para 
+# que se compilen una sola vez al importar el módulo y se guarden en la copia en disco de Numba
+_PESOS = nb.types.Array(nb.float64, 2, 'A')
+_GRADIENTE = nb.types.Array(nb.float64, 1, 'C')
+_HESSIANA = nb.types.Array(nb.float64, 2, 'C')
+
+# Bloques de filas en que _gradiente_perdida_paralelo divide los datos
+_BLOQUES_GRADIENTE = 64
+
+# Firmas de los kernels de descenso de gradiente, para datos en float64 y en float32. X se 
+# recorre en cada iteración, por lo que se pide contigua y quien llama la convierte una sola vez
+_FIRMAS_GRADIENTE = [(Compilacion.VECTOR, nb.float64, Compilacion.MATRIZ_C, Compilacion.VECTOR, _GRADIENTE, nb.boolean),
+                     (Compilacion.VECTOR, nb.float64, Compilacion.MATRIZ32_C, Compilacion.VECTOR32, _GRADIENTE, nb.boolean)]
+_FIRMAS_OPTIMIZAR = [(_PESOS, nb.float64, Compilacion.MATRIZ_C, Compilacion.VECTOR, nb.int64, nb.float64),
+                     (_PESOS, nb.float64, Compilacion.MATRIZ32_C, Compilacion.VECTOR32, nb.int64, nb.float64)]
+
+@njit((nb.float64,), cache=True)
+def _sigmoide(z):
+  '''
+  Calcula la función logística de un número sin desbordarse para valores grandes de |z|.
+
+  Parameters:
+  -----------
+  z : double
+      Valor de la función lineal
+
+  Returns:
+  --------
+  double
+      Valor entre 0 y 1
+  '''
+
+  if z >= 0:
+    return 1 / (1 + np.exp(-z))
+  e = np.exp(z)
+  return e / (1 + e)
+
+@njit(_FIRMAS_GRADIENTE, cache=True)
+def _gradiente_perdida(W, b, X, y, dW, con_perdida):
+  '''
+  Calcula en una sola pasada por las filas la función lineal, la función logística, el 
+  gradiente y la pérdida de entropía cruzada binaria, sin arreglos temporales.
+
+  X y y pueden ser float32 o float64; las sumas se acumulan en float64.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Vector de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos usados como conjunto de entrenamiento del modelo
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+      
+  dW : numpy.ndarray
+      Vector donde se escriben las derivadas de cada entrada de W
+      
+  con_perdida : bool
+      Si es False no se calcula la pérdida, que cuesta un logaritmo por fila, y se devuelve 0
+
+  Returns:
+  --------
+  db : double
+      Derivada del término del sesgo
+      
+  perdida : double
+      Pérdida promedio por fila
+  '''
+
+  n, d = X.shape
+  dW[:] = 0.0
+  db = 0.0
+  perdida = 0.0
+  for i in range(n):
+    z = b
+    for j in range(d):
+      z += W[j] * X[i, j]
+    # Una sola exponencial sirve para la función logística estable y para la pérdida
+    e = np.exp(-abs(z))
+    dz = (1 / (1 + e) if z >= 0 else e / (1 + e)) - y[i]
+    if con_perdida:
+      perdida += max(z, 0.0) - y[i] * z + np.log1p(e)
+    for j in range(d):
+      dW[j] += dz * X[i, j]
+    db += dz
+  
+  m = max(n, 1)
+  for j in range(d):
+    dW[j] /= m
+  return db / m, perdida / m
+
+@njit(_FIRMAS_GRADIENTE, parallel=True, cache=True)
+def _gradiente_perdida_paralelo(W, b, X, y, dW, con_perdida):
+  '''
+  Versión de _gradiente_perdida en varios hilos, para datos grandes o con muchas columnas.
+
+  Las filas se dividen en _BLOQUES_GRADIENTE bloques que se reparten entre los hilos; cada bloque 
+  acumula su gradiente parcial en su propia fila de una matriz pequeña, y al final se suman las 
+  filas. La cantidad de bloques no depende de la de hilos, así el resultado tampoco.
+
+  Parameters:
+  -----------
+  W, b, X, y, dW, con_perdida
+      Los mismos de _gradiente_perdida
+
+  Returns:
+  --------
+  db : double
+      Derivada del término del sesgo
+      
+  perdida : double
+      Pérdida promedio por fila
+  '''
+
+  n, d = X.shape
+  n_bloques = max(min(_BLOQUES_GRADIENTE, n), 1)
+  parcial = np.zeros((n_bloques, d + 2))
+  for bloque in prange(n_bloques):
+    for i in range(bloque * n // n_bloques, (bloque + 1) * n // n_bloques):
+      z = b
+      for j in range(d):
+        z += W[j] * X[i, j]
+      e = np.exp(-abs(z))
+      dz = (1 / (1 + e) if z >= 0 else e / (1 + e)) - y[i]
+      if con_perdida:
+        parcial[bloque, d + 1] += max(z, 0.0) - y[i] * z + np.log1p(e)
+      for j in range(d):
+        parcial[bloque, j] += dz * X[i, j]
+      parcial[bloque, d] += dz
+  
+  m = max(n, 1)
+  for j in range(d):
+    dW[j] = parcial[:, j].sum() / m
+  return parcial[:, d].sum() / m, parcial[:, d + 1].sum() / m
+
+@njit(_FIRMAS_OPTIMIZAR, cache=True)
+def _optimizar(W, b, X, y, num_iterations, learning_rate):
+  '''
+  Utiliza un algoritmo iterativo llamado "descenso de gradiente" para
+  optimizar los parámetros.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Tensor de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos usados como conjunto de entrenamiento del modelo, son los datos
+      predichos
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+      
+  num_iterations : int
+      Cantidad de iteraciones a realizar en el algoritmo
+      
+  learning_rate : double
+      Factor de escala para controlar la velocidad de aprendizaje en cada
+      iteración, suele ser menor a 1 y positiva
+
+  Returns:
+  --------
+  W : numpy.ndarray
+     matriz de pesos optimizada
+     
+  b : double
+     sesgo optimizado
+  '''
+
+  # Cada iteración recorre X una sola vez con el kernel fusionado
+  dW = np.empty(X.shape[1])
+  for i in range(num_iterations):
+    db, _ = _gradiente_perdida(W[0], b, X, y, dW, False)
+    W[0] -= learning_rate * dW
+    b -= learning_rate * db
+  return W, b
+
+@njit(_FIRMAS_OPTIMIZAR, parallel=True, cache=True)
+def _optimizar_paralelo(W, b, X, y, num_iterations, learning_rate):
+  '''
+  Versión de _optimizar que calcula el gradiente de cada iteración en varios hilos.
+
+  Parameters:
+  -----------
+  W, b, X, y, num_iterations, learning_rate
+      Los mismos de _optimizar
+
+  Returns:
+  --------
+  W : numpy.ndarray
+     matriz de pesos optimizada
+     
+  b : double
+     sesgo optimizado
+  '''
+
+  dW = np.empty(X.shape[1])
+  for i in range(num_iterations):
+    db, _ = _gradiente_perdida_paralelo(W[0], b, X, y, dW, False)
+    W[0] -= learning_rate * dW
+    b -= learning_rate * db
+  return W, b
+
+@njit([(Compilacion.VECTOR, nb.float64, Compilacion.MATRIZ_C, Compilacion.VECTOR, _GRADIENTE, _HESSIANA),
+       (Compilacion.VECTOR, nb.float64, Compilacion.MATRIZ32_C, Compilacion.VECTOR32, _GRADIENTE, _HESSIANA)],
+      cache=True)
+def _gradiente_hessiana(W, b, X, y, g, H):
+  '''
+  Calcula en una sola pasada por las filas el gradiente y la matriz hessiana de la pérdida de 
+  entropía cruzada binaria promedio, con el sesgo como última coordenada.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Vector de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos usados como conjunto de entrenamiento del modelo
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+      
+  g : numpy.ndarray
+      Vector de largo columnas de X + 1 donde se escribe el gradiente
+      
+  H : numpy.ndarray
+      Matriz cuadrada de lado columnas de X + 1 donde se escribe la hessiana
+
+  Returns:
+  --------
+  None
+  '''
+
+  n, d = X.shape
+  g[:] = 0.0
+  H[:, :] = 0.0
+  for i in range(n):
+    z = b
+    for j in range(d):
+      z += W[j] * X[i, j]
+    e = np.exp(-abs(z))
+    a = 1 / (1 + e) if z >= 0 else e / (1 + e)
+    dz = a - y[i]
+    peso = a * (1 - a)
+    # Solo se llena el triángulo superior, el resto se copia al final
+    for j in range(d):
+      g[j] += dz * X[i, j]
+      pj = peso * X[i, j]
+      for k in range(j, d):
+        H[j, k] += pj * X[i, k]
+      H[j, d] += pj
+    g[d] += dz
+    H[d, d] += peso
+  
+  m = max(n, 1)
+  for j in range(d + 1):
+    g[j] /= m
+    for k in range(j, d + 1):
+      H[j, k] /= m
+      H[k, j] = H[j, k]
+
+@njit([(Compilacion.MATRIZ, nb.float64, Compilacion.MATRIZ), (Compilacion.MATRIZ, nb.float64, Compilacion.MATRIZ32)], 
+      cache=True)
+def _probabilidades(W, b, X):
+  '''
+  Calcula la probabilidad de la clase 1 de cada fila de X, fila por fila y sin transponer X.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Tensor de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos a evaluar
+
+  Returns:
+  --------
+  A : numpy.ndarray
+      Vector con la probabilidad de cada fila
+  '''
+
+  A = np.empty(X.shape[0])
+  for i in range(X.shape[0]):
+    z = b
+    for j in range(X.shape[1]):
+      z += W[0, j] * X[i, j]
+    A[i] = _sigmoide(z)
+  return A
+
+@njit((Compilacion.MATRIZ, nb.float64, Compilacion.MATRIZ), cache=True)
+def _predecir(W, b, X):
+  '''
+  Se calculan las probabilidades con base en la función logística (A), fila por fila con 
+  _probabilidades y sin transponer X, y se ponen los "y" predichos con base en A.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Tensor de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos usados como conjunto de entrenamiento del modelo, son los datos
+      predichos
+
+  Returns:
+  --------
+  numpy.ndarray
+      Vector con los valores predichos (0 o 1) para cada entrada en X
+  '''
+
+  A = _probabilidades(W, b, X)
+  return np.where(A > 0.5, 1, 0)
+
+@njit((Compilacion.MATRIZ, nb.float64, Compilacion.MATRIZ, Compilacion.VECTOR), cache=True)
+def _perdida(W, b, X, y):
+  '''
+  Calcula la pérdida de entropía cruzada binaria promedio del modelo en un conjunto de datos.
+
+  Se calcula a partir de z como max(z, 0) - y * z + log(1 + exp(-|z|)), que es la misma pérdida
+  pero no se desborda ni calcula el logaritmo de cero cuando la probabilidad es 0 o 1.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Tensor de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos en los que se evalúa el modelo
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+
+  Returns:
+  --------
+  perdida : double
+      Pérdida promedio por fila
+  '''
+
+  m = X.shape[0]
+  total = 0.0
+  for i in range(m):
+    z = b
+    for j in range(X.shape[1]):
+      z += W[0, j] * X[i, j]
+    total += max(z, 0.0) - y[i] * z + np.log1p(np.exp(-abs(z)))
+  return total / max(m, 1)
+
+@njit((_PESOS, nb.float64, Compilacion.MATRIZ, Compilacion.VECTOR, Compilacion.ENTEROS, nb.int64, nb.int64,
+       nb.float64, nb.float64, nb.float64, _PESOS, nb.int64), cache=True)
+def _epoca_minilotes(W, b, X, y, orden, tamano_lote, optimizador, learning_rate, beta1, beta2, momentos, paso):
+  '''
+  Recorre una vez las filas de X en el orden dado, en minilotes, y actualiza los parámetros 
+  después de cada minilote.
+
+  W y momentos se modifican en el lugar. El gradiente del minilote se acumula fila por fila, 
+  sin crear copias de las filas del minilote.
+
+  Parameters:
+  -----------
+  W : numpy.ndarray
+      Tensor de pesos, uno de los parámetros del modelo
+      
+  b : double
+      Término de sesgo, uno de los parámetros del modelo
+      
+  X : numpy.ndarray
+      Datos usados como conjunto de entrenamiento del modelo
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+      
+  orden : numpy.ndarray
+      Índices de las filas en el orden en que se recorren
+      
+  tamano_lote : int
+      Cantidad de filas de cada minilote
+      
+  optimizador : int
+      0 para descenso de gradiente estocástico, 1 para momentum y 2 para Adam
+      
+  learning_rate : double
+      Tasa de aprendizaje
+      
+  beta1, beta2 : double
+      Factores de decaimiento del primer y segundo momento. Momentum solo usa beta1
+      
+  momentos : numpy.ndarray
+      Matriz de 2 x (columnas de X + 1) con el primer y segundo momento de cada parámetro, 
+      la última columna corresponde al sesgo
+      
+  paso : int
+      Cantidad de actualizaciones hechas antes de esta época, la usa Adam para corregir el sesgo
+
+  Returns:
+  --------
+  b : double
+      Sesgo actualizado
+      
+  paso : int
+      Cantidad de actualizaciones hechas al final de la época
+      
+  perdida : double
+      Suma de la pérdida de cada fila, calculada antes de actualizar su minilote
+  '''
+
+  n = orden.shape[0]
+  d = X.shape[1]
+  gradiente = np.empty(d + 1)
+  perdida = 0.0
+  for inicio in range(0, n, tamano_lote):
+    fin = min(inicio + tamano_lote, n)
+    gradiente[:] = 0.0
+    for k in range(inicio, fin):
+      i = orden[k]
+      z = b
+      for j in range(d):
+        z += W[0, j] * X[i, j]
+      perdida += max(z, 0.0) - y[i] * z + np.log1p(np.exp(-abs(z)))
+      dz = _sigmoide(z) - y[i]
+      for j in range(d):
+        gradiente[j] += dz * X[i, j]
+      gradiente[d] += dz
+    
+    paso += 1
+    for j in range(d + 1):
+      g = gradiente[j] / (fin - inicio)
+      if optimizador == 0:
+        delta = learning_rate * g
+      elif optimizador == 1:
+        momentos[0, j] = beta1 * momentos[0, j] + g
+        delta = learning_rate * momentos[0, j]
+      else:
+        momentos[0, j] = beta1 * momentos[0, j] + (1 - beta1) * g
+        momentos[1, j] = beta2 * momentos[1, j] + (1 - beta2) * g * g
+        m_corregido = momentos[0, j] / (1 - beta1 ** paso)
+        v_corregido = momentos[1, j] / (1 - beta2 ** paso)
+        delta = learning_rate * m_corregido / (np.sqrt(v_corregido) + 1e-8)
+      if j < d:
+        W[0, j] -= delta
+      else:
+        b -= delta
+  return b, paso, perdida
+
+@njit((Compilacion.MATRIZ, Compilacion.VECTOR, Compilacion.ENTEROS, nb.int64, nb.int64, nb.float64, nb.float64),
+      nogil=True, cache=True)
+def _validar_configuracion(X, y, pliegue, k, num_iterations, learning_rate, regularizacion):
+  '''
+  Entrena y evalúa el modelo en cada pliegue de una validación cruzada con una configuración.
+
+  Cada pliegue se entrena con descenso de gradiente completo sobre las filas de los demás 
+  pliegues, que se recorren por índice sin copiar X. La pérdida incluye la penalización 
+  regularizacion / 2 * ||W||^2, que no se aplica al sesgo.
+
+  Parameters:
+  -----------
+  X : numpy.ndarray
+      Datos de todas las filas
+      
+  y : numpy.ndarray
+      Los datos reales del modelo
+      
+  pliegue : numpy.ndarray
+      Pliegue de cada fila, entre 0 y k - 1
+      
+  k : int
+      Cantidad de pliegues
+      
+  num_iterations : int
+      Número de iteraciones del descenso de gradiente
+      
+  learning_rate : double
+      Tasa de aprendizaje del descenso de gradiente
+      
+  regularizacion : double
+      Peso de la penalización L2 de los pesos
+
+  Returns:
+  --------
+  accuracy_train : numpy.ndarray
+      Precisión en las filas de entrenamiento de cada pliegue
+      
+  accuracy_val : numpy.ndarray
+      Precisión en las filas de validación de cada pliegue
+  '''
+
+  n, d = X.shape
+  accuracy_train = np.empty(k)
+  accuracy_val = np.empty(k)
+  W = np.empty(d)
+  dW = np.empty(d)
+  for f in range(k):
+    filas = np.empty(n, dtype=np.int64)
+    m = 0
+    for i in range(n):
+      if pliegue[i] != f:
+        filas[m] = i
+        m += 1
+    
+    W[:] = 0.0
+    b = 0.0
+    for it in range(num_iterations):
+      dW[:] = 0.0
+      db = 0.0
+      for r in range(m):
+        i = filas[r]
+        z = b
+        for j in range(d):
+          z += W[j] * X[i, j]
+        dz = _sigmoide(z) - y[i]
+        for j in range(d):
+          dW[j] += dz * X[i, j]
+        db += dz
+      for j in range(d):
+        W[j] -= learning_rate * (dW[j] / max(m, 1) + regularizacion * W[j])
+      b -= learning_rate * db / max(m, 1)
+    
+    aciertos = np.zeros(2)
+    totales = np.zeros(2)
+    for i in range(n):
+      z = b
+      for j in range(d):
+        z += W[j] * X[i, j]
+      prediccion = 1.0 if z > 0 else 0.0
+      grupo = 1 if pliegue[i] == f else 0
+      totales[grupo] += 1
+      if prediccion == y[i]:
+        aciertos[grupo] += 1
+    accuracy_train[f] = 100 * aciertos[0] / max(totales[0], 1)
+    accuracy_val[f] = 100 * aciertos[1] / max(totales[1], 1)
+  return accuracy_train, accuracy_val
+
+@njit((Compilacion.MATRIZ_C, Compilacion.VECTOR, Compilacion.MATRIZ, Compilacion.VECTOR, nb.int64, nb.float64), 
+      cache=True)
+def _regresion_logistica(X_train, y_train, X_val, y_val, num_iterations, learning_rate):
+  '''
+  Kernel de RegresionLogistica.regresion_logistica, con los datos ya convertidos a float64.
+
+  Parameters:
+  -----------
+  X_train, y_train, X_val, y_val : numpy.ndarray
+      Datos de entrenamiento y de testeo
+      
+  num_iterations : int
+      Número de iteraciones del descenso de gradiente
+      
+  learning_rate : double
+      Tasa de aprendizaje del descenso de gradiente
+
+  Returns:
+  --------
+  accuracy_train : double
+      Precisión del modelo en el conjunto de datos de entrenamiento
+      
+  accuracy_val : double
+      Precisión del modelo en el conjunto de datos de testeo
+  '''
+
+  W = np.zeros((1, X_train.shape[1]))
+  b = 0.0
+  W, b = _optimizar(W, b, X_train, y_train, num_iterations, learning_rate)
+  y_prediction_train = _predecir(W, b, X_train)
+  y_prediction_validation = _predecir(W, b, X_val)
+  accuracy_train = 100 - np.mean(np.abs(y_prediction_train - y_train)) * 100
+  accuracy_val = 100 - np.mean(np.abs(y_prediction_validation - y_val)) * 100
+  return accuracy_train, accuracy_val
 
 class RegresionLogistica(Madre):
     """
@@ -13,31 +607,75 @@ class RegresionLogistica(Madre):
     ----------
     ruta : str
            Cadena de texto con la ruta de un archivo
+           
+    W : numpy.ndarray
+        Pesos del modelo entrenado con fit, o None si no se ha entrenado
+        
+    b : double
+        Sesgo del modelo entrenado con fit, o None si no se ha entrenado
+        
+    iteraciones : int
+        Iteraciones, o épocas, que usó el último entrenamiento con fit
+        
+    normalizacion : tuple
+        Centro y escala de cada columna, calculados con ajustar_normalizacion, o None
   
     Methods
     -------
-    def funcion_sigmoide(z)
-        Calcula la función logística de un vector
-    
-    def propagacion_adelante(W, b, X)
-        Calcula el resultado z de una función lineal, la probabilidad con la
-        función sigmoide y una función de pérdida conocida como "pérdida de
-        entropía cruzada binaria"
-    
-    def propagacion_atras(X, A, y)
-        Calcula el gradiente, en este caso, las derivadas de W y b
-    
-    def optimizar(W, b, X, y, num_iterations, learning_rate):
-        Utiliza un algoritmo iterativo llamado "descenso de gradiente" para
-        optimizar los parámetros
+    def regresion_logistica(X_train, y_train, X_val, y_val, num_iterations=2000, learning_rate=0.5):
+        Entrena con descenso de gradiente y calcula la precisión en los datos de entrenamiento 
+        y de validación, con los kernels de Numba del módulo
+        
+    def entrenar_por_lotes(X_train, y_train=None, X_val=None, y_val=None, epocas=100, tamano_lote=32,
+                           learning_rate=0.01, optimizador='adam', beta1=0.9, beta2=0.999, paciencia=10,
+                           tolerancia=1e-4, semilla=None):
+        Entrena el modelo con minilotes y SGD, momentum o Adam, con parada temprana, sobre datos en 
+        memoria o leídos por bloques
+        
+    def bloques_csv(self, tamano_bloque=100_000, objetivo="Outcome", transformar=None):
+        Devuelve una función que lee el archivo por bloques, para entrenar sin cargarlo completo
+        
+    def validacion_cruzada(X, y, learning_rates=(0.5,), iteraciones=(2000,), regularizaciones=(0.0,), k=5, 
+                           semilla=None, n_procesos=None):
+        Evalúa con validación cruzada de k pliegues todas las combinaciones de hiperparámetros, 
+        en paralelo con un grupo de procesos
+        
+    def fit(self, X, y, num_iterations=2000, learning_rate=None, metodo='gradiente', paralelo=False, 
+            tolerancia=1e-6, **opciones):
+        Entrena el modelo con descenso de gradiente, minilotes, Newton (IRLS) o L-BFGS y guarda 
+        sus parámetros en el objeto
+        
+    def predict_proba(self, X, normalizar=False):
+        Calcula la probabilidad de la clase 1 con el modelo entrenado
+        
+    def predict(self, X, umbral=0.5, normalizar=False):
+        Predice la clase de cada fila con el modelo entrenado
+        
+    def guardar_modelo(self, ruta):
+        Guarda los parámetros del modelo en un archivo .npz
+        
+    def cargar_modelo(self, ruta):
+        Carga los parámetros del modelo de un archivo .npz
+        
+    def predecir_csv(self, ruta_entrada, ruta_salida=None, tamano_bloque=100_000, objetivo="Outcome", 
+                     transformar=None, umbral=0.5):
+        Evalúa el modelo en un archivo csv leído por bloques
+        
+    def ajustar_normalizacion(self, X, metodo='minmax'):
+        Calcula y guarda el centro y la escala de cada columna
+        
+    def normalizar(self, X):
+        Aplica la normalización guardada a datos nuevos
         
-    def predecir(W, b, X):
-        Se calculan las probabilidades con base en la función logística (A) y se
-        ponen los "y" predichos con base en las probabilidades de A
+    def construir_datos(self, normalizacion='minmax', test_size=0.20, random_state=None, recalcular=False):
+        Separa y normaliza los datos y, con una semilla fija, los guarda como arreglos contiguos
         
-    def entrenar(self):
-        Se ejecuta el modelo de regresión logística con las funciones anteriores
+    def medir_tiempos(self):
+        Mide el tiempo de regresion_logistica en dos series de 10 ejecuciones
     """
+    
+    # Optimizadores de entrenar_por_lotes y su código en el kernel
+    __OPTIMIZADORES = {'sgd' : 0, 'momentum' : 1, 'adam' : 2}
 
     def __init__(self, ruta):
       """
@@ -54,9 +692,77 @@ class RegresionLogistica(Madre):
       """
 
       super().__init__(ruta)
+      self.__W = None
+      self.__b = None
+      self.__iteraciones = None
+      self.__normalizacion = None
+      self.__datos = None
+    
+    @property
+    def W(self):
+      '''
+      Método get de la clase RegresionLogistica
+      
+      Parameters:
+      ----------
+      None
+      
+      Returns:
+      -------
+      W : numpy.ndarray
+          Pesos del modelo entrenado, o None si no se ha entrenado
+      '''
+      return self.__W
+    
+    @property
+    def b(self):
+      '''
+      Método get de la clase RegresionLogistica
+      
+      Parameters:
+      ----------
+      None
+      
+      Returns:
+      -------
+      b : double
+          Sesgo del modelo entrenado, o None si no se ha entrenado
+      '''
+      return self.__b
+    
+    @property
+    def iteraciones(self):
+      '''
+      Método get de la clase RegresionLogistica
+      
+      Parameters:
+      ----------
+      None
+      
+      Returns:
+      -------
+      iteraciones : int
+          Iteraciones, o épocas, que usó el último entrenamiento con fit
+      '''
+      return self.__iteraciones
+    
+    @property
+    def normalizacion(self):
+      '''
+      Método get de la clase RegresionLogistica
+      
+      Parameters:
+      ----------
+      None
+      
+      Returns:
+      -------
+      normalizacion : tuple
+          Centro y escala de cada columna, o None si no se ha calculado
+      '''
+      return self.__normalizacion
     
     @staticmethod
-    @jit(nopython=True)
     def regresion_logistica(X_train, y_train, X_val, y_val, num_iterations=2000, learning_rate=0.5):
       
         """
@@ -92,170 +798,708 @@ class RegresionLogistica(Madre):
             Precisión del modelo en el conjunto de datos de testeo
         """
       
-        def funcion_sigmoide(z):
-          '''
-          Calcula la función logística de un vector.
-      
-          Parameters:
-          -----------
-          z : numpy.ndarray
-              Vector de valores numéricos, calculado con numpy
-      
-          Returns:
-          --------
-          double
-              Valor entre 0 y 1, este es el resultado de la función logística
-          '''
-
-          return 1 / (1 + np.exp(-z))
-
-        def propagacion_adelante(W, b, X):
-          '''
-          Calcula el resultado z de una función lineal, la probabilidad con la
-          función sigmoide y una función de pérdida conocida como "pérdida de
-          entropía cruzada binaria".
-      
-          Parameters:
-          -----------
-          W : numpy.ndarray
-              Tensor de pesos, uno de los parámetros del modelo
-              
-          b : double
-              Término de sesgo, uno de los parámetros del modelo
-              
-          X : numpy.ndarray
-              Datos usados como conjunto de entrenamiento del modelo, son los datos
-              predichos
-      
-          Returns:
-          --------
-          A : double
-              Valor entre 0 y 1, este es el resultado de la función logística con un
-              vector Z calculado con los valores del modelo
-          '''
-
-          Z = np.dot(W, X.T) + b
-          A = funcion_sigmoide(Z)
-          return A
-
-        def propagacion_atras(X, A, y):
-          '''
-          Calcula el gradiente, en este caso, las derivadas de W y b.
-      
-          Parameters:
-          -----------
-          X : numpy.ndarray
-              Datos usados como conjunto de entrenamiento del modelo, son los datos
-              predichos
-              
-          A : double
-              Resultado de la función logística con un vector Z calculado con los
-              valores del modelo, se obtiene con la función de forward_propagation
-              
-          y : numpy.ndarray
-              Los datos reales del modelo
+        # Los kernels están compilados para float64, los datos se convierten una sola vez
+        return _regresion_logistica(np.ascontiguousarray(X_train, dtype = np.float64), np.asarray(y_train, dtype = np.float64),
+                                    np.asarray(X_val, dtype = np.float64), np.asarray(y_val, dtype = np.float64),
+                                    num_iterations, learning_rate)
       
-          Returns:
-          --------
-          dW : numpy.ndarray
-               Vector con las derivadas de cada entrada de W
-              
-          db : double
-               Valor que representa la derivada del término del sesgo
-          '''
-
-          m = X.shape[0]
-          dZ = A - y
-          dW = np.dot(dZ, X) / m
-          db = np.sum(dZ) / m
-          return dW, db
-
-        def optimizar(W, b, X, y, num_iterations, learning_rate):
-          '''
-          Utiliza un algoritmo iterativo llamado "descenso de gradiente" para
-          optimizar los parámetros.
-      
-          Parameters:
-          -----------
-          W : numpy.ndarray
-              Tensor de pesos, uno de los parámetros del modelo
-              
-          b : double
-              Término de sesgo, uno de los parámetros del modelo
-              
-          X : numpy.ndarray
-              Datos usados como conjunto de entrenamiento del modelo, son los datos
-              predichos
-              
-          y : numpy.ndarray
-              Los datos reales del modelo
-              
-          num_iterations : int
-              Cantidad de iteraciones a realizar en el algoritmo
-              
-          learning_rate : double
-              Factor de escala para controlar la velocidad de aprendizaje en cada
-              iteración, suele ser menor a 1 y positiva
-      
-          Returns:
-          --------
-          W : numpy.ndarray
-             matriz de pesos optimizada
-             
-          b : double
-             sesgo optimizado
-          '''
-
-          for i in range(num_iterations):
-            A = propagacion_adelante(W, b, X)
-            dW, db = propagacion_atras(X, A, y)
-            W -= learning_rate * dW
-            b -= learning_rate * db
-          return W, b
-
-        def predecir(W, b, X):
-          '''
-          Se calculan las probabilidades con base en la función logística (A) y se
-          ponen los "y" predichos con base en las probabilidades de A.
-      
-          Parameters:
-          -----------
-          W : numpy.ndarray
-              Tensor de pesos, uno de los parámetros del modelo
-              
-          b : double
-              Término de sesgo, uno de los parámetros del modelo
-              
-          X : numpy.ndarray
-              Datos usados como conjunto de entrenamiento del modelo, son los datos
-              predichos
-      
-          Returns:
-          --------
-          numpy.ndarray
-              Vector con los valores predichos (0 o 1) para cada entrada en X
-          '''
-
-          Z = np.dot(W, X.T) + b
-          A = funcion_sigmoide(Z)
-          return np.where(A > 0.5, 1, 0)
-      
-        W = np.zeros((1, X_train.shape[1]))
-        b = 0
-        W, b = optimizar(W, b, X_train, y_train, num_iterations, learning_rate)
-        y_prediction_train = predecir(W, b, X_train)
-        y_prediction_validation = predecir(W, b, X_val)
-        accuracy_train = 100 - np.mean(np.abs(y_prediction_train - y_train)) * 100
-        accuracy_val = 100 - np.mean(np.abs(y_prediction_validation - y_val)) * 100
-        return accuracy_train, accuracy_val
-      
-    def construir_datos(self):
+    @staticmethod
+    def entrenar_por_lotes(X_train, y_train=None, X_val=None, y_val=None, epocas=100, tamano_lote=32,
+                           learning_rate=0.01, optimizador='adam', beta1=0.9, beta2=0.999, paciencia=10,
+                           tolerancia=1e-4, semilla=None):
+        """
+        Entrena un modelo de regresión logística con minilotes, actualizando los parámetros después de 
+        cada minilote con descenso de gradiente estocástico, momentum o Adam.
+        
+        Cada época recorre los datos una vez en un orden aleatorio, así que el costo crece con la 
+        cantidad de épocas y no con el tamaño de los datos por la cantidad de iteraciones. Los datos 
+        de entrenamiento pueden estar en memoria o llegar por bloques: en ese caso X_train es una 
+        función que devuelve, en cada época, un iterable de tuplas (X, y), como la de bloques_csv.
+        
+        El entrenamiento se detiene cuando la pérdida de validación, o la de entrenamiento si no hay 
+        datos de validación, no mejora más que la tolerancia durante paciencia épocas seguidas, y 
+        se devuelven los parámetros de la mejor época.
+        
+        Parameters:
+        -----------
+        X_train : numpy.ndarray o callable
+                  Conjunto de datos de entrenamiento, o función que devuelve los bloques (X, y)
+            
+        y_train : numpy.ndarray, opcional
+                  Etiquetas del conjunto de entrenamiento. No se usa si X_train es una función
+            
+        X_val : numpy.ndarray, opcional
+                Conjunto de datos de validación. Por defecto es None
+            
+        y_val : numpy.ndarray, opcional
+                Etiquetas del conjunto de validación. Por defecto es None
+            
+        epocas : int, opcional
+                 Cantidad máxima de pasadas por los datos de entrenamiento. Por defecto es 100
+            
+        tamano_lote : int, opcional
+                      Cantidad de filas de cada minilote. Por defecto es 32
+            
+        learning_rate : double, opcional
+                        Tasa de aprendizaje. Por defecto es 0.01
+            
+        optimizador : str, opcional
+                      'sgd', 'momentum' o 'adam'. Por defecto es 'adam'
+            
+        beta1, beta2 : double, opcional
+                       Factores de decaimiento del primer y segundo momento. Por defecto 0.9 y 0.999
+            
+        paciencia : int, opcional
+                    Épocas sin mejora antes de detenerse, None para no detenerse antes. Por defecto es 10
+            
+        tolerancia : double, opcional
+                     Mejora mínima de la pérdida para contar como mejora. Por defecto es 1e-4
+            
+        semilla : int, opcional
+                  Semilla del orden aleatorio de las filas. Por defecto es None
+        
+        Returns:
+        --------
+        W : numpy.ndarray
+            Matriz de pesos de la mejor época
+            
+        b : double
+            Sesgo de la mejor época
+            
+        historial : pandas.DataFrame
+            Pérdida de entrenamiento y de validación de cada época
+        """
+        
+        if optimizador not in RegresionLogistica.__OPTIMIZADORES:
+            raise ValueError(f"Optimizador no soportado: {optimizador}")
+        codigo = RegresionLogistica.__OPTIMIZADORES[optimizador]
+        
+        if callable(X_train):
+            bloques = X_train
+        else:
+            datos = (np.ascontiguousarray(X_train, dtype = np.float64), np.asarray(y_train, dtype = np.float64))
+            bloques = lambda: (datos,)
+        
+        validar = X_val is not None
+        if validar:
+            X_val = np.ascontiguousarray(X_val, dtype = np.float64)
+            y_val = np.asarray(y_val, dtype = np.float64)
+        
+        rng = np.random.default_rng(semilla)
+        W = None
+        b = 0.0
+        paso = 0
+        mejor = (np.inf, None, b)
+        sin_mejora = 0
+        historial = []
+        
+        for epoca in range(epocas):
+            perdida = 0.0
+            filas = 0
+            for X, y in bloques():
+                X = np.asarray(X, dtype = np.float64)
+                y = np.asarray(y, dtype = np.float64)
+                if W is None:
+                    W = np.zeros((1, X.shape[1]))
+                    momentos = np.zeros((2, X.shape[1] + 1))
+                
+                orden = rng.permutation(X.shape[0])
+                b, paso, perdida_bloque = _epoca_minilotes(W, b, X, y, orden, tamano_lote, codigo, learning_rate,
+                                                           beta1, beta2, momentos, paso)
+                perdida += perdida_bloque
+                filas += X.shape[0]
+            
+            if filas == 0:
+                raise ValueError("Los datos de entrenamiento no tienen filas")
+            perdida_train = perdida / filas
+            perdida_val = _perdida(W, b, X_val, y_val) if validar else np.nan
+            historial.append({'epoca' : epoca + 1, 'perdida_train' : perdida_train, 'perdida_val' : perdida_val})
+            
+            # Parada temprana con la pérdida de validación, o la de entrenamiento si no hay validación
+            monitoreada = perdida_val if validar else perdida_train
+            if monitoreada < mejor[0] - tolerancia:
+                mejor = (monitoreada, W.copy(), b)
+                sin_mejora = 0
+            else:
+                sin_mejora += 1
+                if paciencia is not None and sin_mejora >= paciencia:
+                    break
+        
+        if mejor[1] is not None:
+            W, b = mejor[1], mejor[2]
+        
+        return W, b, pd.DataFrame(historial)
+    
+    def bloques_csv(self, tamano_bloque=100_000, objetivo="Outcome", transformar=None):
       '''
-      Método que construye la separación de los datos correspondiente.
+      Devuelve una función que lee el archivo csv por bloques, para entrenar sin cargarlo completo.
+      
+      Cada llamada a la función vuelve a abrir el archivo, así que sirve para recorrerlo en cada 
+      época de entrenar_por_lotes.
+  
+      Parameters:
+      -----------
+      tamano_bloque : int, opcional
+                      Cantidad de filas de cada bloque. Por defecto es 100_000
+                      
+      objetivo : str, opcional
+                 Columna con la variable a predecir. Por defecto es "Outcome"
+                 
+      transformar : callable, opcional
+                    Función que se aplica a la matriz X de cada bloque. Por defecto es None, 
+                    que aplica la normalización guardada en el objeto, si la hay
+  
+      Returns:
+      --------
+      bloques : callable
+                Función sin argumentos que devuelve un generador de tuplas (X, y)
+      '''
+      
+      def bloques():
+        for bloque in pd.read_csv(self.ruta, chunksize = tamano_bloque):
+          X = bloque.drop([objetivo], axis = 1).to_numpy(dtype = np.float64)
+          y = bloque[objetivo].to_numpy(dtype = np.float64)
+          yield (transformar(X) if transformar is not None else self.normalizar(X)), y
+      
+      return bloques
+      
+    @staticmethod
+    def validacion_cruzada(X, y, learning_rates=(0.5,), iteraciones=(2000,), regularizaciones=(0.0,), k=5, 
+                           semilla=None, n_procesos=None):
+        """
+        Evalúa con validación cruzada de k pliegues todas las combinaciones de tasas de aprendizaje, 
+        cantidades de iteraciones y pesos de regularización L2.
+        
+        Las configuraciones se reparten en un grupo de procesos. X, y y los pliegues se copian una 
+        sola vez a memoria compartida y cada proceso los lee desde ahí, en lugar de recibir una 
+        copia con cada configuración; los pliegues tampoco copian X, se recorren por índice. Todas 
+        las configuraciones usan los mismos pliegues, así sus resultados se pueden comparar.
+        
+        Parameters:
+        -----------
+        X : numpy.ndarray
+            Datos de todas las filas
+            
+        y : numpy.ndarray
+            Etiquetas de todas las filas
+            
+        learning_rates : list, opcional
+                         Tasas de aprendizaje a evaluar. Por defecto es (0.5,)
+            
+        iteraciones : list, opcional
+                      Cantidades de iteraciones a evaluar. Por defecto es (2000,)
+            
+        regularizaciones : list, opcional
+                           Pesos de la penalización L2 a evaluar. Por defecto es (0.0,)
+            
+        k : int, opcional
+            Cantidad de pliegues. Por defecto es 5
+            
+        semilla : int, opcional
+                  Semilla de la asignación de filas a pliegues. Por defecto es None
+            
+        n_procesos : int, opcional
+                     Cantidad de procesos. Con 1 se calcula en el proceso actual. Por defecto usa 
+                     todos los núcleos
+        
+        Returns:
+        --------
+        df : pandas.DataFrame
+             DataFrame con cada configuración, la precisión promedio de entrenamiento y de validación, 
+             la desviación de la precisión de validación entre pliegues y el tiempo de cálculo
+        """
+        
+        X = np.ascontiguousarray(X, dtype = np.float64)
+        n = X.shape[0]
+        
+        # Cada fila recibe un pliegue, con pliegues de tamaños que difieren a lo sumo en una fila
+        pliegue = np.empty(n, dtype = np.float64)
+        pliegue[np.random.default_rng(semilla).permutation(n)] = np.arange(n) % k
+        datos = np.column_stack((X, np.asarray(y, dtype = np.float64), pliegue))
+        
+        tareas = list(itertools.product(learning_rates, iteraciones, regularizaciones))
+        
+        if n_procesos == 1:
+            resultados = [_evaluar_configuracion(*tarea, k, datos=datos) for tarea in tareas]
+        else:
+            memoria = shared_memory.SharedMemory(create=True, size=datos.nbytes)
+            try:
+                np.ndarray(datos.shape, dtype=datos.dtype, buffer=memoria.buf)[:] = datos
+                # Se usa 'spawn' porque los hilos de Numba no sobreviven bien a un fork
+                with ProcessPoolExecutor(max_workers=n_procesos, mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_iniciar_trabajador, 
+                                         initargs=(memoria.name, datos.shape)) as grupo:
+                    resultados = list(grupo.map(_evaluar_configuracion, *zip(*tareas), itertools.repeat(k)))
+            finally:
+                memoria.close()
+                memoria.unlink()
+        
+        df = pd.DataFrame([{'learning_rate' : tasa, 'num_iterations' : iters, 'regularizacion' : reg,
+                            'accuracy_train' : np.mean(acc_train), 'accuracy_val' : np.mean(acc_val),
+                            'desviacion_val' : np.std(acc_val), 'tiempo' : tiempo}
+                           for (tasa, iters, reg), (acc_train, acc_val, tiempo) in zip(tareas, resultados)])
+        return df
+      
+    @staticmethod
+    def __flotante(X):
+      '''
+      Convierte los datos a un arreglo de punto flotante que aceptan los kernels: los float32 se 
+      conservan, para no duplicar la memoria, y todo lo demás se convierte a float64.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos a convertir
+  
+      Returns:
+      --------
+      X : numpy.ndarray
+          Datos en float32 o float64
+      '''
+      
+      X = np.asarray(X)
+      return X if X.dtype == np.float32 else X.astype(np.float64, copy = False)
+    
+    def fit(self, X, y, num_iterations=2000, learning_rate=None, metodo='gradiente', paralelo=False, 
+            tolerancia=1e-6, **opciones):
+      '''
+      Entrena el modelo y guarda sus parámetros en el objeto, para predecir después sin volver 
+      a entrenar.
+      
+      Los métodos de segundo orden suelen converger en decenas de iteraciones en lugar de miles: 
+      'newton' (IRLS) resuelve en cada iteración un sistema con la hessiana, de lado columnas + 1, 
+      y conviene con pocas columnas; 'lbfgs' solo usa gradientes y conviene con muchas columnas. 
+      Ambos se detienen cuando el mayor valor absoluto del gradiente es menor que la tolerancia.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray o callable
+          Datos de entrenamiento. Con metodo='lotes' también puede ser una función que devuelve 
+          los bloques (X, y), como la de bloques_csv
+          
+      y : numpy.ndarray
+          Etiquetas de entrenamiento
+          
+      num_iterations : int, opcional
+                       Número de iteraciones del descenso de gradiente, o máximo de iteraciones de 
+                       'newton' y 'lbfgs'. Por defecto es 2000
+                       
+      learning_rate : double, opcional
+                      Tasa de aprendizaje. No se usa con 'newton' ni 'lbfgs'. Por defecto es None, 
+                      que usa 0.5 con 'gradiente' y el valor por defecto de entrenar_por_lotes 
+                      con 'lotes'
+                      
+      metodo : str, opcional
+               'gradiente' para descenso de gradiente completo, 'lotes' para entrenar_por_lotes, 
+               'newton' para el método de Newton (IRLS) o 'lbfgs' para L-BFGS de scipy. Por 
+               defecto es 'gradiente'
+               
+      paralelo : bool, opcional
+                 Si es True el gradiente de cada iteración se calcula en varios hilos, conviene 
+                 con muchas filas o columnas. Aplica a 'gradiente' y 'lbfgs'. Por defecto es False
+                 
+      tolerancia : double, opcional
+                   Norma máxima del gradiente a la que se detienen 'newton' y 'lbfgs'. Por defecto 
+                   es 1e-6
+               
+      **opciones
+               Otros argumentos de entrenar_por_lotes, como epocas, optimizador o X_val
+  
+      Returns:
+      --------
+      self : RegresionLogistica
+             El mismo objeto, ya entrenado
+      '''
+      
+      if metodo == 'gradiente':
+        # Los datos en float32 se usan tal cual, los parámetros siempre son float64
+        X = np.ascontiguousarray(RegresionLogistica.__flotante(X))
+        W = np.zeros((1, X.shape[1]))
+        optimizar = _optimizar_paralelo if paralelo else _optimizar
+        W, b = optimizar(W, 0.0, X, np.asarray(y, dtype = X.dtype), num_iterations, 
+                         0.5 if learning_rate is None else learning_rate)
+        iteraciones = num_iterations
+      elif metodo == 'lotes':
+        # Solo se pasa la tasa si se indicó, la de entrenar_por_lotes es distinta a la del gradiente
+        if learning_rate is not None:
+          opciones['learning_rate'] = learning_rate
+        W, b, historial = RegresionLogistica.entrenar_por_lotes(X, y, **opciones)
+        iteraciones = len(historial)
+      elif metodo == 'newton':
+        W, b, iteraciones = RegresionLogistica.__newton(X, y, num_iterations, tolerancia)
+      elif metodo == 'lbfgs':
+        W, b, iteraciones = RegresionLogistica.__lbfgs(X, y, num_iterations, tolerancia, paralelo)
+      else:
+        raise ValueError(f"Método no soportado: {metodo}")
+      
+      self.__W = W
+      self.__b = float(b)
+      self.__iteraciones = iteraciones
+      return self
+    
+    @staticmethod
+    def __newton(X, y, max_iteraciones, tolerancia):
+      '''
+      Minimiza la pérdida con el método de Newton, que para la regresión logística equivale a 
+      mínimos cuadrados reponderados iterativamente (IRLS).
+      
+      Si un paso aumenta la pérdida, por ejemplo con datos casi separables, se reduce a la mitad 
+      hasta que no la aumente; si ningún paso lo logra se detiene y devuelve la última 
+      iteración aceptada.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos de entrenamiento
+          
+      y : numpy.ndarray
+          Etiquetas de entrenamiento
+          
+      max_iteraciones : int
+                        Máximo de iteraciones
+                        
+      tolerancia : double
+                   Norma máxima del gradiente a la que se detiene
+  
+      Returns:
+      --------
+      W : numpy.ndarray
+          Matriz de pesos
+          
+      b : double
+          Sesgo
+          
+      iteraciones : int
+          Iteraciones realizadas
+      '''
+      
+      X = np.ascontiguousarray(RegresionLogistica.__flotante(X))
+      y = np.asarray(y, dtype = X.dtype)
+      d = X.shape[1]
+      theta = np.zeros(d + 1)
+      g = np.empty(d + 1)
+      H = np.empty((d + 1, d + 1))
+      dW = np.empty(d)
+      _, perdida = _gradiente_perdida(theta[:d], 0.0, X, y, dW, True)
+      
+      iteraciones = 0
+      while iteraciones < max_iteraciones:
+        _gradiente_hessiana(theta[:d], theta[d], X, y, g, H)
+        if np.max(np.abs(g)) < tolerancia:
+          break
+        
+        # Un término pequeño en la diagonal evita que la hessiana sea singular
+        H[np.diag_indices_from(H)] += 1e-10
+        paso = np.linalg.solve(H, g)
+        
+        t = 1.0
+        while t >= 1e-10:
+          nuevo = theta - t * paso
+          _, nueva_perdida = _gradiente_perdida(nuevo[:d], nuevo[d], X, y, dW, True)
+          if nueva_perdida <= perdida:
+            break
+          t /= 2
+        else:
+          # Ningún paso reduce la pérdida, se conserva la última iteración aceptada
+          break
+        theta, perdida = nuevo, nueva_perdida
+        iteraciones += 1
+      
+      return theta[:d].reshape(1, d), theta[d], iteraciones
+    
+    @staticmethod
+    def __lbfgs(X, y, max_iteraciones, tolerancia, paralelo):
+      '''
+      Minimiza la pérdida con L-BFGS de scipy.optimize, que aproxima la hessiana con los últimos 
+      gradientes. La pérdida y el gradiente de cada evaluación salen de una sola pasada del 
+      kernel fusionado.
+      
+      El criterio de parada es la tolerancia del gradiente: la de la pérdida se anula para que 
+      scipy no se detenga antes cuando la pérdida apenas cambia. Llegar al máximo de iteraciones 
+      no es un error, como en el descenso de gradiente, cualquier otra falla de scipy sí.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos de entrenamiento
+          
+      y : numpy.ndarray
+          Etiquetas de entrenamiento
+          
+      max_iteraciones : int
+                        Máximo de iteraciones
+                        
+      tolerancia : double
+                   Norma máxima del gradiente a la que se detiene
+                   
+      paralelo : bool
+                 Si es True se usa el kernel en varios hilos
+  
+      Returns:
+      --------
+      W : numpy.ndarray
+          Matriz de pesos
+          
+      b : double
+          Sesgo
+          
+      iteraciones : int
+          Iteraciones realizadas
+      '''
+      
+      X = np.ascontiguousarray(RegresionLogistica.__flotante(X))
+      y = np.asarray(y, dtype = X.dtype)
+      d = X.shape[1]
+      gradiente_perdida = _gradiente_perdida_paralelo if paralelo else _gradiente_perdida
+      dW = np.empty(d)
+      
+      def perdida_y_gradiente(theta):
+        db, perdida = gradiente_perdida(theta[:d], theta[d], X, y, dW, True)
+        return perdida, np.append(dW, db)
+      
+      resultado = minimize(perdida_y_gradiente, np.zeros(d + 1), jac = True, method = 'L-BFGS-B',
+                           options = {'maxiter' : max_iteraciones, 'gtol' : tolerancia, 'ftol' : 0.0})
+      if not resultado.success and resultado.nit < max_iteraciones:
+        raise ValueError(f"L-BFGS no convergió: {resultado.message}")
+      theta = resultado.x
+      return theta[:d].reshape(1, d), theta[d], resultado.nit
+    
+    def predict_proba(self, X, normalizar=False):
+      '''
+      Calcula la probabilidad de la clase 1 de cada fila con el modelo entrenado.
   
       Parameters:
       -----------
+      X : numpy.ndarray
+          Datos a evaluar, con las mismas columnas y transformaciones que los de entrenamiento. 
+          Un vector se toma como una sola fila
+          
+      normalizar : bool, opcional
+                   Si es True X son datos sin normalizar y se les aplica la normalización 
+                   guardada en el modelo. Por defecto es False
+  
+      Returns:
+      --------
+      A : numpy.ndarray
+          Vector con la probabilidad de cada fila
+      '''
+      
+      if self.__W is None:
+        raise ValueError("El modelo no se ha entrenado, use fit o cargar_modelo")
+      X = RegresionLogistica.__flotante(X)
+      if X.ndim == 1:
+        X = X.reshape(1, -1)
+      if normalizar:
+        X = self.normalizar(X)
+      return _probabilidades(self.__W, self.__b, RegresionLogistica.__flotante(X))
+    
+    def predict(self, X, umbral=0.5, normalizar=False):
+      '''
+      Predice la clase de cada fila con el modelo entrenado.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos a evaluar, con las mismas columnas y transformaciones que los de entrenamiento. 
+          Un vector se toma como una sola fila
+          
+      umbral : double, opcional
+               Probabilidad a partir de la cual se predice la clase 1. Por defecto es 0.5
+               
+      normalizar : bool, opcional
+                   Si es True X son datos sin normalizar y se les aplica la normalización 
+                   guardada en el modelo. Por defecto es False
+  
+      Returns:
+      --------
+      prediccion : numpy.ndarray
+                   Vector con la clase predicha (0 o 1) de cada fila
+      '''
+      
+      return (self.predict_proba(X, normalizar) > umbral).astype(np.int64)
+    
+    def guardar_modelo(self, ruta):
+      '''
+      Guarda los parámetros del modelo, y su normalización si la tiene, en un archivo .npz sin 
+      comprimir.
+  
+      Parameters:
+      -----------
+      ruta : str
+             Ruta del archivo
+  
+      Returns:
+      --------
       None
+      '''
+      
+      if self.__W is None:
+        raise ValueError("El modelo no se ha entrenado, use fit o cargar_modelo")
+      parametros = {'W' : self.__W, 'b' : self.__b}
+      if self.__normalizacion is not None:
+        parametros['centro'], parametros['escala'] = self.__normalizacion
+      np.savez(ruta, **parametros)
+    
+    def cargar_modelo(self, ruta):
+      '''
+      Carga los parámetros del modelo de un archivo .npz creado con guardar_modelo.
+  
+      Parameters:
+      -----------
+      ruta : str
+             Ruta del archivo
+  
+      Returns:
+      --------
+      self : RegresionLogistica
+             El mismo objeto, con los parámetros cargados
+      '''
+      
+      with np.load(ruta) as archivo:
+        self.__W = np.ascontiguousarray(archivo['W'], dtype = np.float64)
+        self.__b = float(archivo['b'])
+        self.__normalizacion = (archivo['centro'], archivo['escala']) if 'centro' in archivo.files else None
+      return self
+    
+    def predecir_csv(self, ruta_entrada, ruta_salida=None, tamano_bloque=100_000, objetivo="Outcome", 
+                     transformar=None, umbral=0.5):
+      '''
+      Evalúa el modelo en un archivo csv leído por bloques, así la memoria usada depende del 
+      tamaño del bloque y no del archivo.
+  
+      Parameters:
+      -----------
+      ruta_entrada : str
+                     Ruta del archivo csv con las covariables
+                     
+      ruta_salida : str, opcional
+                    Ruta del csv donde se escriben los resultados de cada bloque. Por defecto es 
+                    None, los resultados se devuelven en un DataFrame
+                    
+      tamano_bloque : int, opcional
+                      Cantidad de filas de cada bloque. Por defecto es 100_000
+                      
+      objetivo : str, opcional
+                 Columna con la variable a predecir, se ignora si está en el archivo. Por defecto 
+                 es "Outcome"
+                 
+      transformar : callable, opcional
+                    Función que se aplica a la matriz X de cada bloque, la misma que se usó al 
+                    entrenar. Por defecto es None, que aplica la normalización guardada en el 
+                    modelo, si la hay
+                    
+      umbral : double, opcional
+               Probabilidad a partir de la cual se predice la clase 1. Por defecto es 0.5
+  
+      Returns:
+      --------
+      resultado : pandas.DataFrame o str
+                  DataFrame con la probabilidad y la predicción de cada fila, o la ruta de salida
+      '''
+      
+      resultados = []
+      for i, bloque in enumerate(pd.read_csv(ruta_entrada, chunksize = tamano_bloque)):
+        X = bloque.drop(columns = [objetivo], errors = 'ignore').to_numpy(dtype = np.float64)
+        X = transformar(X) if transformar is not None else self.normalizar(X)
+        probabilidad = self.predict_proba(X)
+        resultado = pd.DataFrame({'probabilidad' : probabilidad, 'prediccion' : (probabilidad > umbral).astype(np.int64)},
+                                 index = bloque.index)
+        if ruta_salida is None:
+          resultados.append(resultado)
+        else:
+          resultado.to_csv(ruta_salida, mode = 'w' if i == 0 else 'a', header = i == 0, index = False)
+      
+      if ruta_salida is not None:
+        return ruta_salida
+      return pd.concat(resultados) if resultados else pd.DataFrame(columns = ['probabilidad', 'prediccion'])
+      
+    def ajustar_normalizacion(self, X, metodo='minmax'):
+      '''
+      Calcula el centro y la escala de cada columna y los guarda en el modelo, para aplicar 
+      después la misma normalización a cualquier dato nuevo.
+      
+      Cada columna se normaliza con sus propios valores; con un mínimo y un máximo globales, 
+      las columnas de rango pequeño quedan casi constantes y el descenso de gradiente se vuelve 
+      lento.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos con los que se calcula la normalización, normalmente los de entrenamiento
+          
+      metodo : str, opcional
+               'minmax' lleva cada columna al intervalo [0, 1] y 'estandar' le resta su media y 
+               la divide entre su desviación estándar. Por defecto es 'minmax'
+  
+      Returns:
+      --------
+      self : RegresionLogistica
+             El mismo objeto, con la normalización guardada
+      '''
+      
+      X = np.asarray(X, dtype = np.float64)
+      if metodo == 'minmax':
+        centro = X.min(axis = 0)
+        escala = X.max(axis = 0) - centro
+      elif metodo == 'estandar':
+        centro = X.mean(axis = 0)
+        escala = X.std(axis = 0)
+      else:
+        raise ValueError(f"Normalización no soportada: {metodo}")
+      
+      # Las columnas constantes solo se centran
+      self.__normalizacion = (centro, np.where(escala > 0, escala, 1.0))
+      return self
+    
+    def normalizar(self, X):
+      '''
+      Aplica la normalización guardada en el modelo.
+  
+      Parameters:
+      -----------
+      X : numpy.ndarray
+          Datos sin normalizar, con las mismas columnas que los de entrenamiento
+  
+      Returns:
+      --------
+      X : numpy.ndarray
+          Datos normalizados en un arreglo contiguo de float64, o los mismos datos si el modelo 
+          no tiene normalización
+      '''
+      
+      X = np.ascontiguousarray(X, dtype = np.float64)
+      if self.__normalizacion is None:
+        return X
+      centro, escala = self.__normalizacion
+      return (X - centro) / escala
+      
+    def construir_datos(self, normalizacion='minmax', test_size=0.20, random_state=None, recalcular=False):
+      '''
+      Método que construye la separación de los datos correspondiente.
+      
+      Con una semilla fija la separación se guarda en el objeto como arreglos contiguos de 
+      float64 de solo lectura, así las llamadas siguientes con los mismos normalizacion, 
+      test_size y random_state no vuelven a leer ni a transformar los datos; con otros 
+      argumentos, con random_state=None o si el archivo cambió, se recalcula. Los arreglos se 
+      comparten entre llamadas, por eso no se pueden modificar: 
+      use copy() para obtener una copia modificable. La normalización se calcula por columna 
+      con los datos de entrenamiento y se guarda en el modelo para aplicarla igual al predecir.
+  
+      Parameters:
+      -----------
+      normalizacion : str, opcional
+                      Método de ajustar_normalizacion, o None para no normalizar. Por defecto es 
+                      'minmax'
+                      
+      test_size : double, opcional
+                  Proporción de los datos que se usa para validar. Por defecto es 0.20
+                  
+      random_state : int, opcional
+                     Semilla de la separación (None: escoge una diferente en cada separación). 
+                     Por defecto es None
+                     
+      recalcular : bool, opcional
+                   Si es True se vuelven a leer, separar y normalizar los datos. Por defecto es False
   
       Returns:
       --------
@@ -276,14 +1520,17 @@ class RegresionLogistica(Madre):
               los datos reales
       '''
 
+      # Como en la copia de Madre, la llave incluye la fecha de modificación y el tamaño del archivo
+      estado = os.stat(self.ruta)
+      llave = (normalizacion, test_size, random_state, estado.st_mtime_ns, estado.st_size)
+      if random_state is not None and self.__datos is not None and self.__datos[0] == llave and not recalcular:
+        return self.__datos[1]
+      
       datos = super().leer_csv()
       
       # Datos y transformaciones
-      X =  np.array(datos.drop(["Outcome"], axis = 1))
-      y = np.array(datos["Outcome"])
-        
-      # Normalización de los datos
-      X = (X - np.min(X)) / (np.max(X) - np.min(X))
+      X = datos.drop(["Outcome"], axis = 1).to_numpy(dtype = np.float64)
+      y = datos["Outcome"].to_numpy(dtype = np.float64)
         
       # Separa la muestra
       X_train, X_val, y_train, y_val = train_test_split(
@@ -292,13 +1539,27 @@ class RegresionLogistica(Madre):
             
             y, # Variable a predecir
             
-            random_state = None, # (None: escoge una diferente en cada corrida)
+            random_state = random_state, # (None: escoge una diferente en cada corrida)
             
-            test_size = 0.20 # Cantidad de datos de entrenamiento y prueba
+            test_size = test_size # Cantidad de datos de entrenamiento y prueba
             
       )
+      
+      # Normalización de cada columna con los datos de entrenamiento
+      if normalizacion is not None:
+        self.ajustar_normalizacion(X_train, normalizacion)
+      else:
+        self.__normalizacion = None
+      
+      X_train = self.normalizar(X_train)
+      X_val = self.normalizar(X_val)
+      arreglos = tuple(np.ascontiguousarray(A) for A in (X_train, X_val, y_train, y_val))
+      for A in arreglos:
+        A.setflags(write = False)
+      # Sin semilla cada llamada debe dar una separación distinta, por eso no se guarda
+      self.__datos = (llave, arreglos) if random_state is not None else None
         
-      return X_train, X_val, y_train, y_val
+      return arreglos
     
     def medir_tiempos(self):
       '''
@@ -314,14 +1575,13 @@ class RegresionLogistica(Madre):
                        Tiempo de las primeras 10 iteraciones que se realizan con Numba
             
       tiempo_posterior : double
-                         Tiempo de las posteriores 10 iteraciones que se realizan con Numba,
-                         con el código analizado internamente por las primeras iteraciones
+                         Tiempo de las posteriores 10 iteraciones que se realizan con Numba
       '''
       
       # Se crea un array vacío para guardar los tiempo de ejecución
       tiempos = np.array([], dtype = float)
         
-      # Se extrae la data
+      # Se extrae la data antes de medir, así no cuenta en los tiempos
       X_train, X_val, y_train, y_val = self.construir_datos()
         
       # Se itera 10 veces para calcular el tiempo de ejecución del proceso cada vez
@@ -347,10 +1607,9 @@ class RegresionLogistica(Madre):
         # Se calcula el promedio del tiempo de ejecución
       tiempo_inicial = np.sum(tiempos) / 10
         
-        # Dado que la primera iteración demora más tiempo que el resto debido a cómo trabaja Numba,
-        # se procede a realizar el mismo proceso una segunda vez, en la cual se va a notar que el 
-        # tiempo promedio de ejecución se redujo significativamente, ya que una vez "calentadas" 
-        # las funciones, Numba hace el proceso mucho más rápido
+        # Antes la primera iteración incluía la compilación de Numba; ahora los kernels se compilan
+        # al importar el módulo o se cargan de la copia en disco, por lo que ambas mediciones 
+        # deberían ser parecidas
         
       tiempos = np.array([], dtype = float)
 
@@ -370,9 +1629,64 @@ class RegresionLogistica(Madre):
         
           fin = time.time()
             
-      tiempos = np.append(tiempos, (fin - inicio))
+          tiempos = np.append(tiempos, (fin - inicio))
         
       tiempo_posterior = np.sum(tiempos) / 10
         
       return tiempo_inicial, tiempo_posterior
 
+# Los trabajadores de validacion_cruzada viven en procesos aparte, por lo que estas funciones deben 
+# estar a nivel de módulo para que se puedan enviar a los procesos
+_memoria_trabajador = None
+_datos_trabajador = None
+
+def _iniciar_trabajador(nombre, forma):
+    """
+    Prepara un proceso de la validación cruzada: lee los datos desde la memoria compartida.
+    
+    Parameters
+    ----------
+    nombre : str
+        Nombre del bloque de memoria compartida
+    forma : tuple
+        Dimensiones de la matriz con X, y y el pliegue de cada fila
+    
+    Returns
+    -------
+    None
+    """
+    global _memoria_trabajador, _datos_trabajador
+    _memoria_trabajador = shared_memory.SharedMemory(name=nombre)
+    _datos_trabajador = np.ndarray(forma, dtype=np.float64, buffer=_memoria_trabajador.buf)
+
+def _evaluar_configuracion(learning_rate, num_iterations, regularizacion, k, datos=None):
+    """
+    Evalúa una configuración de la validación cruzada.
+    
+    Parameters
+    ----------
+    learning_rate : float
+        Tasa de aprendizaje
+    num_iterations : int
+        Número de iteraciones
+    regularizacion : float
+        Peso de la penalización L2
+    k : int
+        Cantidad de pliegues
+    datos : numpy.ndarray, optional
+        Matriz con X, y y el pliegue de cada fila. Por defecto es la del proceso trabajador
+    
+    Returns
+    -------
+    accuracy_train : numpy.ndarray
+        Precisión de entrenamiento de cada pliegue
+    accuracy_val : numpy.ndarray
+        Precisión de validación de cada pliegue
+    tiempo : float
+        Tiempo de cálculo de la configuración en segundos
+    """
+    datos = datos if datos is not None else _datos_trabajador
+    inicio = time.perf_counter()
+    accuracy_train, accuracy_val = _validar_configuracion(datos[:, :-2], datos[:, -2], datos[:, -1].astype(np.int64), 
+                                                          k, num_iterations, learning_rate, regularizacion)
+    return accuracy_train, accuracy_val, time.perf_counter() - inicio
@@ -1,10 +1,21 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import os
+import re
+import io
+import time
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from joblib import Parallel, delayed
+import numba as nb
 from numba import prange, njit
 import seaborn as sns
 from Madre import Madre
+from Compilacion import Compilacion
+from PlanLimpieza import PlanLimpieza
 
 class TrabajoDataframes(Madre):
     """
@@ -21,11 +32,15 @@ class TrabajoDataframes(Madre):
     banda : int
         Tamaño de la ventana a considerar alrededor de cada valor nulo para calcular el promedio de 
         imputación. La ventana se extiende `banda` posiciones a la izquierda y a la derecha del valor nulo.
+
+    plan : PlanLimpieza
+        Reglas de limpieza que aplica limpiar_datos
     
     Methods
     -------
     limpiar_datos(self)
         Realiza la limpieza del DataFrame eliminando y reemplazando valores según ciertas reglas.
+        Si las columnas son category, los reemplazos se hacen sobre las categorías.
     
     histograma(df, columna)
         Crea un histograma para una columna numérica específica de un DataFrame.
@@ -36,21 +51,48 @@ class TrabajoDataframes(Madre):
     tipos_columnas(df)
         Identifica y separa las columnas numéricas y categóricas en un DataFrame.
     
-    generar_graficos(self, limpiar=True)
+    calcular_estadisticas(df)
+        Calcula los bordes y conteos de los histogramas y las frecuencias de las barras de un DataFrame.
+    
+    estadisticas_graficos(self, recalcular=False)
+        Devuelve los datos de los gráficos del DataFrame, calculándolos solo la primera vez.
+    
+    graficar(self, columna, mostrar=False, ruta=None, **estilo)
+        Dibuja el gráfico de una columna a partir de los datos guardados.
+    
+    generar_graficos(self, n_jobs=1, carpeta=None)
         Genera gráficos de histogramas para variables numéricas y gráficos de barras para variables categóricas.
     
-    imputar_por_prom_movil(self, columna)
-        Imputa valores nulos en una columna específica de un DataFrame utilizando un promedio móvil.
+    comparar_graficos(self, n_jobs=-1, repeticiones=3)
+        Compara el tiempo de generar_graficos en serie y en paralelo.
+    
+    imputar_por_prom_movil(self, columna, grupo=None)
+        Imputa valores nulos en una o varias columnas de un DataFrame utilizando un promedio móvil, 
+        opcionalmente dentro de cada grupo.
+    
+    perfil_nulos(self, recalcular=False)
+        Devuelve la cantidad y el porcentaje de valores nulos de cada columna, sin recalcularlos.
     
-    eliminar_columnas_por_nulos(self, porcentaje)
+    eliminar_columnas_por_nulos(self, porcentaje, vista=True)
         Elimina columnas con un porcentaje alto de valores nulos.
     
-    imputar_por_agrupacion(self)
-        Imputa valores faltantes en la columna 'Salario base' por agrupación.
+    imputar_por_agrupacion(self, columnas='Salario base', grupos=('Género', 'Grado de estudio'), estadistico='media', 
+                           respaldo=True, recorte=0.1)
+        Imputa valores faltantes de una o varias columnas con un estadístico de su grupo, con niveles de respaldo.
+    
+    procesar_por_bloques(self, ruta_salida, etapas=('eliminar_nulos', 'imputar_agrupacion'), porcentaje=0.5, 
+                         columnas='Salario base', grupos=('Género', 'Grado de estudio'), estadistico='media', 
+                         respaldo=True, recorte=0.1, tamano_bloque=100_000)
+        Aplica la limpieza, eliminación de columnas e imputación por bloques de filas, sin cargar 
+        todo el archivo en memoria.
     """
 
     
-    def __init__(self, ruta):
+    # Columnas de texto con pocos valores distintos que el modo categórico lee como category
+    __CATEGORICAS = ('estcivil', 'ocuparec', 'regsalud', 'provincia', 'provocu', 'provregis', 'reginec',
+                     'edadsrec', 'autopsia', 'asistmed', 'nacionalid', 'sexo')
+
+    def __init__(self, ruta, por_bloques=False, categorico=False, filtrar_al_leer=False):
         """
         Constructor de la clase TrabajoDataframes
         
@@ -58,17 +100,34 @@ class TrabajoDataframes(Madre):
         ----------
         ruta : str
             Una cadena de texto con una ruta de un archivo
+        por_bloques : bool, optional
+            Si es True el archivo no se carga en memoria y solo se puede procesar con 
+            procesar_por_bloques. Por defecto es False
+        categorico : bool, optional
+            Si es True las columnas de texto con pocos valores distintos se leen como category, 
+            y limpiar_datos las recodifica cambiando sus categorías. Por defecto es False
+        filtrar_al_leer : bool, optional
+            Si es True solo se leen las columnas y filas que conserva el plan de limpieza, y 
+            no se cargan las demás. Por defecto es False
         
         Returns
         -------
         None
         """
         super().__init__(ruta)
-        if (isinstance(ruta, str)): 
-            self.__dataframe = self.leer_excel()
+        self.__plan = self.__plan_muertes()
+        if (isinstance(ruta, str) and not por_bloques): 
+            dtype = {columna: 'category' for columna in self.__CATEGORICAS} if categorico else None
+            if filtrar_al_leer:
+                self.__dataframe = self.leer_excel(usecols=self.__plan.usa_columna, dtype=dtype, 
+                                                   filtros=self.__plan.filtros)
+            else:
+                self.__dataframe = self.leer_excel(dtype=dtype)
         else:
             self.__dataframe = None  
         self.__banda = 4
+        self.__estadisticas = None
+        self.__perfil_nulos = None
 
 
     @property
@@ -103,6 +162,38 @@ class TrabajoDataframes(Madre):
         """
         self.__banda = nueva_banda
 
+    @property
+    def plan(self):
+        """
+        Método get de la clase TrabajoDataframes
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        plan : PlanLimpieza
+            Reglas de limpieza que aplica limpiar_datos
+        """
+        return self.__plan
+
+    @plan.setter
+    def plan(self, nuevo_plan):
+        """
+        Método set de la clase TrabajoDataframes
+
+        Parameters
+        ----------
+        nuevo_plan : PlanLimpieza
+            Nuevas reglas de limpieza
+
+        Returns
+        -------
+        None
+        """
+        self.__plan = nuevo_plan
+
     @property
     def dataframe(self):
         """
@@ -134,6 +225,7 @@ class TrabajoDataframes(Madre):
         None
         """
         self.__dataframe = nuevo_dataframe
+        self.__datos_modificados()
 
     
     def __str__(self):
@@ -166,82 +258,168 @@ class TrabajoDataframes(Madre):
         muertes_cr : pandas.DataFrame
             DataFrame limpio según las reglas especificadas
         """
-        muertes_cr = self.__dataframe
-    
-        muertes_cr = muertes_cr.drop(columns = ['pc', 'causamuer', 'des_causa', 'instmurio', 'pcocu', 'nacmadre', 'pcregis', 'gruposcb'])
-    
-        # Se realiza la limpieza de la base de datos
-        
-        muertes_cr = muertes_cr[muertes_cr['edads'] >= 15]
-        
-        muertes_cr = muertes_cr[muertes_cr['anodef'] >= 2014]
-        
-        muertes_cr = muertes_cr[muertes_cr['anotrab'] >= 2014]
-        
-        muertes_cr = muertes_cr[muertes_cr['anodeclara'] >= 2014]
+        return self.__limpiar(self.__dataframe, self.__plan)
+
+    @staticmethod
+    def __plan_muertes():
+        """
+        Crea el plan con las reglas de limpieza de la base de muertes.
         
-        muertes_cr['estcivil'] = muertes_cr['estcivil'].str.replace("Ã³", "o")
+        Parameters
+        ----------
+        None
         
-        muertes_cr['ocuparec'] = muertes_cr['ocuparec'].str.replace("Ã¡", "a")
+        Returns
+        -------
+        plan : PlanLimpieza
+            Columnas que se eliminan, filtros, recodificaciones y categorías de la base de muertes
+        """
+        eliminar = ['pc', 'causamuer', 'des_causa', 'instmurio', 'pcocu', 'nacmadre', 'pcregis', 'gruposcb']
         
-        muertes_cr['ocuparec'] = muertes_cr['ocuparec'].str.replace("Ã©", "e")
+        filtros = [('edads', '>=', 15), ('anodef', '>=', 2014), ('anotrab', '>=', 2014), ('anodeclara', '>=', 2014)]
         
-        muertes_cr['ocuparec'] = muertes_cr['ocuparec'].str.replace("Ã", "i")
+        # Reemplazos de caracteres mal codificados por columna, en el orden en que se aplican
+        recodificaciones = [
+            ('estcivil', {"Ã³" : "o"}),
+            ('ocuparec', {"Ã¡" : "a", "Ã©" : "e", "Ã" : "i"}),
+            ('regsalud', {"Ã\xad" : "i", "Ã³" : "o"}),
+            ('provincia', {"Ã©" : "e", "Ã³" : "o"}),
+            ('provocu', {"Ã©" : "e", "Ã³" : "o"}),
+            ('provregis', {"Ã©" : "e", "Ã³" : "o"}),
+            ('reginec', {"Ã\xad" : "i", "Ã³" : "o"}),
+            ('edadsrec', {"100 y mÃ¡s" : "100 - 121"}),
+            ('autopsia', {"Ã©" : "e", "Ã\xad" : "i"}),
+            ('asistmed', {"Ã©" : "e", "Ã\xad" : "i"})
+        ]
         
-        muertes_cr['regsalud'] = muertes_cr['regsalud'].str.replace("Ã\xad", "i")
+        recodificaciones.append(('nacionalid', lambda x: 'Extranjero' if x != 'Costa Rica' else x))
         
-        muertes_cr['regsalud'] = muertes_cr['regsalud'].str.replace("Ã³", "o")
+        otros = ['Ignorado', 'Union libre', 'Separado', 'Menor']
         
-        muertes_cr['provincia'] = muertes_cr['provincia'].str.replace("Ã©", "e")
+        recodificaciones.append(('estcivil', lambda x: 'Otros' if x in otros else x))
         
-        muertes_cr['provincia'] = muertes_cr['provincia'].str.replace("Ã³", "o")
+        trabajadores_activos = ['Profesionales cienti\xadficos e intelectuales', 
+                                'Agricultores y trabajadores calificados agropecuarios, forestales y pesqueros',
+                                'Ocupaciones elementales', 'Trabajadores de los servicios y vendedores de comercios y mercados',
+                                'Operadores de instalaciones y maquinas y ensambladores', 'Tecnicos y profesionales de nivel medio',
+                                'Oficiales, operarios y artesanos de artes mecanicas y de otros oficios', 'Personal de apoyo administrativo',
+                                'Directores y gerentes']
         
-        muertes_cr['provocu'] = muertes_cr['provocu'].str.replace("Ã©", "e")
+        otros_ocupacion = ['Pensionado', 'Persona con discapacidad', 'Estudiante', 'Mal especificadas', 'Privado de libertad']
         
-        muertes_cr['provocu'] = muertes_cr['provocu'].str.replace("Ã³", "o")
+        recodificaciones.append(('ocuparec', lambda x: 'Trabajadores activos' if x in trabajadores_activos 
+                                 else 'Otros' if x in otros_ocupacion else x))
         
-        muertes_cr['provregis'] = muertes_cr['provregis'].str.replace("Ã©", "e")
+        rangos_etarios = ["15 - 19", "20 - 24", "25 - 29", "30 - 34", "35 - 39", "40 - 44", "45 - 49", 
+                          "50 - 54", "55 - 59", "60 - 64", "65 - 69", "70 - 74", "75 - 79", "80 - 84", 
+                          "85 - 89", "90 - 94", "95 - 99", "100 - 121"]
         
-        muertes_cr['provregis'] = muertes_cr['provregis'].str.replace("Ã³", "o")
+        return PlanLimpieza(eliminar, filtros, recodificaciones, {'edadsrec' : rangos_etarios})
+
+    @staticmethod
+    def __recodificar(serie, funcion):
+        """
+        Aplica una función a cada valor distinto de una columna y devuelve el resultado a cada fila.
         
-        muertes_cr['reginec'] = muertes_cr['reginec'].str.replace("Ã\xad", "i")
+        Si la columna es category la función se aplica a las categorías y las que quedan con 
+        el mismo valor se unen en una sola; si no, se aplica a los valores de pd.factorize. 
+        En ambos casos el costo depende de la cantidad de valores distintos y no de la 
+        cantidad de filas.
         
-        muertes_cr['reginec'] = muertes_cr['reginec'].str.replace("Ã³", "o")
+        Parameters
+        ----------
+        serie : pandas.Series
+            Columna que se quiere recodificar
+        funcion : function
+            Función que recibe un valor, o NaN para los nulos, y devuelve su nuevo valor
         
-        muertes_cr['edadsrec'] = muertes_cr['edadsrec'].str.replace("100 y mÃ¡s", "100 - 121")
+        Returns
+        -------
+        serie : pandas.Series
+            Columna recodificada, con el mismo índice y tipo de dato
+        """
+        categorica = isinstance(serie.dtype, pd.CategoricalDtype)
+        if categorica:
+            codigos, unicos = serie.cat.codes.to_numpy(), serie.cat.categories
+        else:
+            codigos, unicos = pd.factorize(serie)
         
-        muertes_cr['autopsia'] = muertes_cr['autopsia'].str.replace("Ã©", "e")
+        # El código -1 de los nulos toma el último elemento, que es el valor que les asigna la función
+        nuevos = [funcion(valor) for valor in unicos] + [funcion(np.nan)]
+        codigos_nuevos, categorias = pd.factorize(pd.Index(nuevos, dtype = unicos.dtype))
+        codigos = codigos_nuevos[codigos]
         
-        muertes_cr['autopsia'] = muertes_cr['autopsia'].str.replace("Ã\xad", "i")
+        if categorica:
+            valores = pd.Categorical.from_codes(codigos, categories = categorias, 
+                                                ordered = serie.cat.ordered)
+            return pd.Series(valores, index = serie.index, name = serie.name)
+        valores = categorias.take(codigos, allow_fill = True, fill_value = np.nan)
+        return pd.Series(valores, index = serie.index, dtype = serie.dtype, name = serie.name)
+
+    @staticmethod
+    def __normalizar_texto(serie, reemplazos):
+        """
+        Aplica todos los reemplazos de texto de una columna en una sola pasada.
         
-        muertes_cr['asistmed'] = muertes_cr['asistmed'].str.replace("Ã©", "e")
+        Los reemplazos se combinan en una sola expresión regular, con los textos más largos
+        primero, y se aplican solo a los valores distintos de la columna con __recodificar.
         
-        muertes_cr['asistmed'] = muertes_cr['asistmed'].str.replace("Ã\xad", "i")
+        Parameters
+        ----------
+        serie : pandas.Series
+            Columna de texto a corregir
+        reemplazos : dict
+            Diccionario con el texto a buscar y el texto que lo reemplaza
         
-        muertes_cr['nacionalid'] = muertes_cr['nacionalid'].apply(lambda x: 'Extranjero' if x != 'Costa Rica' else x)
+        Returns
+        -------
+        serie : pandas.Series
+            Columna corregida, con el mismo índice y tipo de dato
+        """
+        patron = re.compile('|'.join(re.escape(texto) for texto in sorted(reemplazos, key = len, reverse = True)))
         
-        otros = ['Ignorado', 'Union libre', 'Separado', 'Menor']
+        def corregir(valor):
+            return patron.sub(lambda m: reemplazos[m.group(0)], valor) if isinstance(valor, str) else valor
         
-        muertes_cr['estcivil'] = muertes_cr['estcivil'].replace(otros, 'Otros')
+        return TrabajoDataframes.__recodificar(serie, corregir)
+
+    @staticmethod
+    def __limpiar(muertes_cr, plan, filtrar=True):
+        """
+        Aplica un plan de limpieza a un DataFrame o a un bloque de filas.
         
-        trabajadores_activos = ['Profesionales cienti\xadficos e intelectuales', 
-                                'Agricultores y trabajadores calificados agropecuarios, forestales y pesqueros',
-                                'Ocupaciones elementales', 'Trabajadores de los servicios y vendedores de comercios y mercados',
-                                'Operadores de instalaciones y maquinas y ensambladores', 'Tecnicos y profesionales de nivel medio',
-                                'Oficiales, operarios y artesanos de artes mecanicas y de otros oficios', 'Personal de apoyo administrativo',
-                                'Directores y gerentes']
+        Todos los filtros se evalúan en una sola máscara y las filas y columnas que se 
+        conservan se copian una sola vez; luego se aplican las recodificaciones en orden.
         
-        muertes_cr['ocuparec'] = muertes_cr['ocuparec'].replace(trabajadores_activos, 'Trabajadores activos')
+        Parameters
+        ----------
+        muertes_cr : pandas.DataFrame
+            DataFrame o bloque de filas con los datos de muertes
+        plan : PlanLimpieza
+            Reglas de limpieza que se aplican
+        filtrar : bool, optional
+            Si es False no se evalúan los filtros, porque las filas ya se filtraron al leerlas.
+            Por defecto es True
         
-        otros = ['Pensionado', 'Persona con discapacidad', 'Estudiante', 'Mal especificadas', 'Privado de libertad']
+        Returns
+        -------
+        muertes_cr : pandas.DataFrame
+            DataFrame limpio según las reglas especificadas
+        """
+        # Las columnas del plan que ya no se leyeron se ignoran
+        conservadas = [columna for columna in muertes_cr.columns if columna not in plan.eliminar]
         
-        muertes_cr['ocuparec'] = muertes_cr['ocuparec'].replace(otros, 'Otros')
+        filas = plan.mascara(muertes_cr) if filtrar else slice(None)
+        muertes_cr = muertes_cr.loc[filas, conservadas]
         
-        rangos_etarios = ["15 - 19", "20 - 24", "25 - 29", "30 - 34", "35 - 39", "40 - 44", "45 - 49", 
-                          "50 - 54", "55 - 59", "60 - 64", "65 - 69", "70 - 74", "75 - 79", "80 - 84", 
-                          "85 - 89", "90 - 94", "95 - 99", "100 - 121"]
+        for columna, regla in plan.recodificaciones:
+            if isinstance(regla, dict):
+                muertes_cr[columna] = TrabajoDataframes.__normalizar_texto(muertes_cr[columna], regla)
+            else:
+                muertes_cr[columna] = TrabajoDataframes.__recodificar(muertes_cr[columna], regla)
         
-        muertes_cr['edadsrec'] = pd.Categorical(muertes_cr['edadsrec'], categories = rangos_etarios, ordered = True)
+        for columna, categorias in plan.categorias.items():
+            muertes_cr[columna] = pd.Categorical(muertes_cr[columna], categories = categorias, ordered = True)
         
         muertes_cr.reset_index(drop = True, inplace = True)
         
@@ -271,13 +449,11 @@ class TrabajoDataframes(Madre):
         None
         '''
         
-        fig, ax = plt.subplots()
-        
-        ax.hist(df[columna], bins = 'auto', color = 'blue', edgecolor = 'black')
+        estadisticas = TrabajoDataframes.calcular_estadisticas(df[[columna]])[columna]
         
-        ax.set_xlabel('Valor')
+        fig, ax = plt.subplots()
         
-        ax.set_ylabel('Frecuencia')
+        _dibujar_histograma(estadisticas['bordes'], estadisticas['conteos'], ax = ax)
         
         if mostrar:
           
@@ -311,17 +487,11 @@ class TrabajoDataframes(Madre):
         None
         '''
         
-        categorias, frecuencias = np.unique(df[columna], return_counts = True)
+        estadisticas = TrabajoDataframes.calcular_estadisticas(df[[columna]])[columna]
         
         fig, ax = plt.subplots()
         
-        ax.bar(categorias, frecuencias, color = 'red')
-        
-        ax.set_xlabel('Categorías')
-        
-        ax.set_ylabel('Frecuencia')
-    
-        ax.tick_params(axis = 'x', rotation = 45)
+        _dibujar_barras(estadisticas['categorias'], estadisticas['frecuencias'], ax = ax)
         
         if mostrar:
           
@@ -360,110 +530,324 @@ class TrabajoDataframes(Madre):
         return numericas, categoricas
 
     
+    @staticmethod
+    def calcular_estadisticas(df):
+        '''
+        Función que calcula los datos de todos los gráficos de un DataFrame: los bordes y conteos 
+        de los histogramas de las columnas numéricas y las frecuencias de las categóricas.
+        
+        Se recorre el DataFrame una sola vez; el resultado es pequeño y basta para dibujar, 
+        cambiar el estilo o exportar los gráficos sin volver a leer las filas. Las clases de los 
+        histogramas son las mismas de np.histogram(bins = 'auto'), que es lo que usaba ax.hist.
+
+        Parameters:
+        ----------
+        df: pandas.DataFrame
+           DataFrame que contiene los datos
+
+        Returns:
+        -------
+        estadisticas: dict
+           Diccionario con el nombre de cada columna y un diccionario con 'tipo' ('histograma' o 
+           'barras') y sus 'bordes' y 'conteos', o sus 'categorias' y 'frecuencias'
+        '''
+        
+        numericas, categoricas = TrabajoDataframes.tipos_columnas(df)
+        
+        estadisticas = {}
+        
+        for columna in numericas:
+          
+          conteos, bordes = np.histogram(df[columna].dropna().to_numpy(), bins = 'auto')
+          
+          estadisticas[columna] = {'tipo' : 'histograma', 'bordes' : bordes, 'conteos' : conteos}
+        
+        for columna in categoricas:
+          
+          serie = df[columna]
+          
+          if isinstance(serie.dtype, pd.CategoricalDtype):
+            
+            # Con categorías basta contar los códigos, en el orden de las categorías
+            frecuencias = np.bincount(serie.cat.codes.to_numpy() + 1, minlength = len(serie.cat.categories) + 1)[1:]
+            
+            presentes = frecuencias > 0
+            
+            categorias = serie.cat.categories.astype(str).to_numpy()[presentes]
+            
+            frecuencias = frecuencias[presentes]
+            
+          else:
+            
+            conteo = serie.value_counts(dropna = True).sort_index()
+            
+            categorias, frecuencias = conteo.index.astype(str).to_numpy(), conteo.to_numpy()
+          
+          estadisticas[columna] = {'tipo' : 'barras', 'categorias' : categorias, 'frecuencias' : frecuencias}
+        
+        return estadisticas
+
+    def estadisticas_graficos(self, recalcular = False):
+        '''
+        Función que devuelve los datos de los gráficos del DataFrame, calculándolos solo la primera vez.
+        
+        Los datos guardados se borran cuando el DataFrame cambia por el método set o por los 
+        métodos de imputación.
+
+        Parameters:
+        ----------
+        recalcular: bool
+           Si es True se vuelven a calcular aunque estén guardados. Por defecto es False
+        
+        Returns:
+        --------
+        estadisticas: dict
+           Resultado de calcular_estadisticas para el DataFrame actual
+        '''
+        
+        if self.__estadisticas is None or recalcular:
+          
+          self.__estadisticas = self.calcular_estadisticas(self.__dataframe)
+        
+        return self.__estadisticas
+
+    def graficar(self, columna, mostrar = False, ruta = None, **estilo):
+        '''
+        Función que dibuja el gráfico de una columna a partir de los datos guardados, sin leer sus filas.
+
+        Parameters:
+        ----------
+        columna: str
+           Nombre de la columna
+        
+        mostrar: bool
+           Si es True se muestra el gráfico con pyplot. Por defecto es False
+        
+        ruta: str
+           Ruta del archivo png. Por defecto es None y se devuelven los bytes del png
+        
+        **estilo: dict
+           Opciones de matplotlib para las barras, por ejemplo color = 'green'
+        
+        Returns:
+        --------
+        grafico: bytes o str
+           Bytes del png o ruta del archivo; None si se muestra el gráfico
+        '''
+        
+        estadisticas = self.estadisticas_graficos()[columna]
+        
+        if estadisticas['tipo'] == 'histograma':
+          
+          dibujar, datos = _dibujar_histograma, (estadisticas['bordes'], estadisticas['conteos'])
+        
+        else:
+          
+          dibujar, datos = _dibujar_barras, (estadisticas['categorias'], estadisticas['frecuencias'])
+        
+        if not mostrar:
+          
+          return dibujar(*datos, ruta = ruta, **estilo)
+        
+        fig, ax = plt.subplots()
+        
+        dibujar(*datos, ax = ax, **estilo)
+        
+        plt.show()
+
     # Definimos una función que genere los gráficos deseados
-    def generar_graficos(self):
+    def generar_graficos(self, n_jobs = 1, carpeta = None):
         '''
         Función que genera gráficos de histogramas para variables numéricas y gráficos de barras para variables categóricas.
+        
+        Los conteos de cada gráfico salen de estadisticas_graficos y a los procesos de joblib solo 
+        se envían esos conteos, no el DataFrame. Cada proceso dibuja con el backend Agg, sin pyplot.
 
         Parameters:
         ----------
-        None
+        n_jobs: int
+           Cantidad de procesos que dibujan los gráficos, -1 para usar todos los núcleos. Por defecto es 1
+        
+        carpeta: str
+           Carpeta donde se guardan los gráficos como png. Por defecto es None y se devuelven los bytes del png
         
         Returns:
         --------
-        None
+        graficos: dict
+           Diccionario con el nombre de cada columna y los bytes de su png, o la ruta del archivo
         '''
         
-        muertes_cr = self.__dataframe
-        # Obtenemos las variables numericas y categóricas
-        numericas, categoricas = self.tipos_columnas(muertes_cr)
+        estadisticas = self.estadisticas_graficos()
         
-        # Generamos los gráficos tanto de histogramas como de barras usando la paralelización de joblib
-        histogramas = Parallel(n_jobs = 1)(
+        if carpeta is not None:
+          
+          os.makedirs(carpeta, exist_ok = True)
         
-          delayed(self.histograma)(muertes_cr, col) for col in numericas
+        def ruta(columna):
           
-        )
+          return None if carpeta is None else os.path.join(carpeta, re.sub(r'[^\w.-]', '_', str(columna)) + '.png')
+        
+        # Generamos los gráficos tanto de histogramas como de barras usando la paralelización de joblib
+        tareas = [delayed(_dibujar_histograma)(est['bordes'], est['conteos'], ruta(col)) if est['tipo'] == 'histograma'
+                  else delayed(_dibujar_barras)(est['categorias'], est['frecuencias'], ruta(col))
+                  for col, est in estadisticas.items()]
+        
+        graficos = Parallel(n_jobs = n_jobs)(tareas)
+        
+        return dict(zip(estadisticas.keys(), graficos))
 
-        graficos_barras = Parallel(n_jobs = 1)(
+    def comparar_graficos(self, n_jobs = -1, repeticiones = 3):
+        '''
+        Función que compara el tiempo de generar_graficos en serie y en paralelo.
+
+        Parameters:
+        ----------
+        n_jobs: int
+           Cantidad de procesos de la versión en paralelo. Por defecto es -1, todos los núcleos
+        
+        repeticiones: int
+           Cantidad de veces que se mide cada versión. Por defecto es 3
+        
+        Returns:
+        --------
+        df: pandas.DataFrame
+           DataFrame con el tiempo promedio de cada versión y su aceleración respecto a la serie
+        '''
+        
+        # Una primera llamada levanta los procesos de joblib, que luego se reutilizan
+        self.generar_graficos(n_jobs = n_jobs)
+        
+        tiempos = []
+        
+        for procesos in (1, n_jobs):
+          
+          inicio = time.perf_counter()
           
-          delayed(self.barras)(muertes_cr, col) for col in categoricas
+          for _ in range(repeticiones):
+            
+            self.generar_graficos(n_jobs = procesos)
           
-        )
+          tiempos.append((time.perf_counter() - inicio) / repeticiones)
+        
+        df = pd.DataFrame({'version' : ['serie', 'paralelo'], 'n_jobs' : [1, n_jobs], 'tiempo' : tiempos})
+        
+        df['aceleracion'] = tiempos[0] / df['tiempo']
+        
+        return df
     
 #-------------------------------------------------------------------------------------------------------
 
 #--------------------------------------Ejercicio 4------------------------------------------------------
    
-    def imputar_por_prom_movil(self, columna):
+    @staticmethod
+    @njit((Compilacion.MATRIZ, Compilacion.ENTEROS, Compilacion.ENTEROS, nb.int64), parallel=True, cache=True)
+    def _promedio_movil_numba(datos, inicios, finales, banda):
+        '''
+        Función que imputa los valores nulos de varias columnas con el promedio móvil de sus vecinos.
+        
+        Se calculan las sumas acumuladas de los valores y de la cantidad de valores no nulos de 
+        cada columna, así el promedio de cualquier ventana se obtiene con dos restas y el costo 
+        por valor nulo no depende de `banda`. La ventana de cada fila no sale del grupo de la fila.
+    
+        Parameters
+        ----------
+        datos : numpy.ndarray
+            Matriz de n x k con los valores de k columnas. Los nulos son np.nan
+        
+        inicios : numpy.ndarray
+            Primera fila del grupo de cada fila
+        
+        finales : numpy.ndarray
+            Fila siguiente a la última del grupo de cada fila
+        
+        banda : int
+            Cantidad de posiciones a la izquierda y a la derecha de cada valor nulo que forman la ventana
+    
+        Returns
+        -------
+        resultado : numpy.ndarray
+            Matriz con los valores nulos reemplazados por el promedio de los valores no nulos de su 
+            ventana. Si la ventana no tiene valores no nulos, el valor queda nulo
+        '''
+        n, k = datos.shape
+        sumas = np.zeros((n + 1, k))
+        cuentas = np.zeros((n + 1, k), dtype=np.int64)
+        
+        for j in prange(k):
+            for i in range(n):
+                valor = datos[i, j]
+                if np.isnan(valor):
+                    sumas[i + 1, j] = sumas[i, j]
+                    cuentas[i + 1, j] = cuentas[i, j]
+                else:
+                    sumas[i + 1, j] = sumas[i, j] + valor
+                    cuentas[i + 1, j] = cuentas[i, j] + 1
+        
+        resultado = datos.copy()
+        
+        for i in prange(n):
+            principio = max(inicios[i], i - banda)
+            final = min(finales[i], i + banda + 1)
+            for j in range(k):
+                if np.isnan(datos[i, j]):
+                    cuenta = cuentas[final, j] - cuentas[principio, j]
+                    if cuenta > 0:
+                        resultado[i, j] = (sumas[final, j] - sumas[principio, j]) / cuenta
+                        
+        return resultado
+
+    def imputar_por_prom_movil(self, columna, grupo = None):
         '''
-        Función que imputa valores nulos en una columna específica de un DataFrame utilizando un promedio móvil.
-        Esta función lee un archivo de Excel, imputa los valores nulos en la columna especificada utilizando
-        el método `imputar_valores_nulos` y retorna el DataFrame con los valores imputados.
+        Función que imputa valores nulos en una o varias columnas de un DataFrame utilizando un promedio móvil.
+        Cada valor nulo se reemplaza por el promedio de los valores no nulos que están a `banda` 
+        posiciones o menos, y se retorna el DataFrame con los valores imputados.
     
         Parameters:
         ----------    
-        columna: str
-            Nombre de la columna en la cual se desean imputar los valores nulos.
+        columna: str o list
+            Nombre de la columna, o lista de columnas, en la cual se desean imputar los valores nulos.
+        
+        grupo: str o list
+            Columna o columnas que definen grupos. Si se da, la ventana de cada fila solo incluye 
+            filas de su mismo grupo, en el orden en que aparecen. Por defecto es None, sin grupos
     
     
         Returns:
         -------
         dataframe: pandas.DataFrame
-            DataFrame que contiene los datos del archivo Excel leído, con los valores nulos en la columna 
-            especificada imputados utilizando un promedio móvil.
+            DataFrame que contiene los datos del archivo Excel leído, con los valores nulos en las columnas 
+            especificadas imputados utilizando un promedio móvil.
         '''
-
-        #Numba tiene limitaciones en cuanto a la compatibilidad con ciertos tipos de datos y estructuras de 
-        #objetos complejas, como instancias de clases. Por lo tanto esta función tuvo que estar dentro del
-        #método y no puede ser un método por sí misma.
-        @njit(parallel=True)
-        def imputar_valores_nulos(data, banda):
-            '''
-            Función que imputa valores nulos en un array de datos utilizando un promedio móvil.
-            
-            Esta función utiliza Numba para acelerar el proceso de imputación de valores nulos en un array,
-            reemplazando cada valor nulo por el promedio de los valores no nulos dentro de una ventana definida 
-            por el parámetro `banda`. La imputación se realiza de manera paralela para mejorar el rendimiento.
-        
-            Parameters
-            ----------
-            data : numpy.ndarray
-                Array de datos que contiene los valores a imputar. Puede contener valores nulos (np.nan).
-            
-            banda : int
-                Tamaño de la ventana a considerar alrededor de cada valor nulo para calcular el promedio de 
-                imputación. La ventana se extiende `banda` posiciones a la izquierda y a la derecha del valor nulo.
-        
-            Returns
-            -------
-            resultado : numpy.ndarray
-                Array de datos con los valores nulos imputados. Los valores nulos originales se reemplazan por el 
-                promedio de los valores no nulos dentro de la ventana definida por `banda`.
-            '''
-            n = len(data)
-            resultado = data.copy()
-            
-            for i in prange(n):
-                if np.isnan(data[i]):
-                    principio = max(0, i - banda)
-                    final = min(n, i + banda + 1)
-                    suma, cuenta = 0.0, 0
-                    
-                    for j in range(principio, final):
-                        if not np.isnan(data[j]):
-                            suma += data[j]
-                            cuenta += 1
-                            
-                    if cuenta > 0:
-                        resultado[i] = suma / cuenta
-                        
-            return resultado
-
         dataframe = self.__dataframe
-        data = dataframe[columna].values
-        data_imputado = imputar_valores_nulos(data, self.__banda)
-        dataframe[columna] = data_imputado
+        columnas = [columna] if isinstance(columna, str) else list(columna)
+        datos = dataframe[columnas].to_numpy(dtype = float, na_value = np.nan)
+        n = len(dataframe)
+        
+        if grupo is None:
+            orden = None
+            inicios = np.zeros(n, dtype = np.int64)
+            finales = np.full(n, n, dtype = np.int64)
+        else:
+            # Se ordenan las filas por grupo, sin cambiar el orden dentro de cada grupo
+            llaves = [grupo] if isinstance(grupo, str) else list(grupo)
+            codigos = dataframe.groupby(llaves, sort = False, dropna = False).ngroup().to_numpy()
+            orden = np.argsort(codigos, kind = 'stable')
+            tamanos = np.bincount(codigos)
+            limites = np.concatenate(([0], np.cumsum(tamanos)))
+            inicios = np.repeat(limites[:-1], tamanos).astype(np.int64)
+            finales = np.repeat(limites[1:], tamanos).astype(np.int64)
+            datos = datos[orden]
+        
+        data_imputado = self._promedio_movil_numba(datos, inicios, finales, self.__banda)
+        
+        if orden is not None:
+            # Se devuelven las filas a su posición original
+            resultado = np.empty_like(data_imputado)
+            resultado[orden] = data_imputado
+            data_imputado = resultado
+        
+        dataframe[columnas] = data_imputado
+        self.__datos_modificados(columnas)
         return dataframe
 
 
@@ -471,18 +855,71 @@ class TrabajoDataframes(Madre):
     
 #--------------------------------------Ejercicio 5------------------------------------------------------    
     
-    def eliminar_columnas_por_nulos(self, porcentaje):
+    def __datos_modificados(self, columnas = None):
+        '''
+        Actualiza los datos guardados después de un cambio en el DataFrame.
+        
+        Parameters:
+        ----------
+        columnas: list
+           Columnas que cambiaron. Por defecto es None, que indica que cambió todo el DataFrame
+    
+        Returns:
+        -------
+        None
+        '''
+        self.__estadisticas = None
+        
+        if columnas is None or self.__perfil_nulos is None:
+            self.__perfil_nulos = None
+        else:
+            # Solo se vuelven a contar los nulos de las columnas que cambiaron
+            self.__perfil_nulos[columnas] = self.__dataframe[columnas].isna().sum()
+
+    def perfil_nulos(self, recalcular = False):
+        '''
+        Función que devuelve la cantidad y el porcentaje de valores nulos de cada columna.
+        
+        Los conteos se calculan una sola vez, en una pasada por el DataFrame, y se actualizan 
+        por columna cuando los métodos de imputación las cambian. Si el DataFrame se modifica 
+        directamente, se debe usar recalcular = True.
+    
+        Parameters:
+        ----------
+        recalcular: bool
+           Si es True se vuelven a contar los nulos de todas las columnas. Por defecto es False
+    
+        Returns:
+        -------
+        perfil: pandas.DataFrame
+           DataFrame con el nombre de cada columna, su cantidad de nulos y su porcentaje de nulos
+        '''
+        if self.__perfil_nulos is None or recalcular:
+            self.__perfil_nulos = self.__dataframe.isna().sum()
+        
+        perfil = pd.DataFrame({'columna' : self.__perfil_nulos.index, 'nulos' : self.__perfil_nulos.to_numpy()})
+        perfil['porcentaje'] = perfil['nulos'] / max(len(self.__dataframe), 1)
+        return perfil
+
+    def eliminar_columnas_por_nulos(self, porcentaje, vista = True):
         '''
         Función que elimina columnas con un porcentaje alto de valores nulos.
-        Esta función lee un archivo de Excel, calcula el número máximo de valores nulos 
-        permitidos por columna basado en el porcentaje especificado, y elimina las columnas 
-        que exceden este umbral.
+        Esta función calcula el número máximo de valores nulos permitidos por columna basado en 
+        el porcentaje especificado, y elimina las columnas que exceden este umbral.
+        
+        Los nulos de cada columna se toman de perfil_nulos, así que probar otro porcentaje solo 
+        selecciona columnas, sin volver a recorrer los datos.
     
         Parameters:
         ----------
         porcentaje: float
            Porcentaje máximo de valores nulos permitidos en una columna para que no sea eliminada.
            Debe ser un valor entre 0 y 1.
+        
+        vista: bool
+           Si es True el resultado comparte los datos con el DataFrame original, y pandas los copia 
+           solo si alguno de los dos se modifica. Si es False se devuelve una copia independiente.
+           Por defecto es True
     
         Returns:
         -------
@@ -490,43 +927,579 @@ class TrabajoDataframes(Madre):
            DataFrame que contiene los datos del archivo Excel leído, con las columnas 
            que exceden el porcentaje de valores nulos eliminadas
         '''
-        # Llamo al método heredado para leer la base de datos
         df = self.__dataframe    
         # Calculamos el número máximo de valores nulos permitidos
         max_nulos = len(df) * porcentaje
         
-        # Filtramos las columnas que tienen menos de max_nulos valores nulos
-        df_filtrado = df.dropna(axis=1, thresh=len(df) - max_nulos)
+        # Conservamos las columnas que tienen max_nulos valores nulos o menos
+        perfil = self.perfil_nulos()
+        conservadas = perfil['columna'][perfil['nulos'] <= max_nulos].tolist()
+        
+        df_filtrado = df.loc[:, conservadas] if vista else df[conservadas].copy()
         
         return df_filtrado
 #------------------------------------------------------------------------------------------------------- 
 
 #--------------------------------------Ejercicio 6------------------------------------------------------ 
     
-    def imputar_por_agrupacion(self):
+    # Estadísticos que acepta imputar_por_agrupacion
+    __ESTADISTICOS = ('media', 'mediana', 'moda', 'media_recortada')
+
+    @staticmethod
+    def __estadistico_por_grupo(valores, codigos, n_grupos, estadistico, recorte):
         '''
-        Función que imputa valores faltantes en la columna 'Salario base' por agrupación.
-        Esta función lee un archivo de Excel, y luego imputa los valores faltantes en la columna 
-        'Salario base' utilizando el promedio de los valores agrupados por 'Género' y 'Grado de estudio'.
+        Función que calcula un estadístico de los valores no nulos de cada grupo, sin recorrer los grupos uno por uno.
+        
+        Los valores se ordenan una sola vez por grupo y por valor; con ese orden la mediana, la moda 
+        y la media recortada de todos los grupos salen de operaciones vectorizadas de numpy.
     
         Parameters:
         ----------
-        None
+        valores: numpy.ndarray
+           Valores de la columna, los nulos son NaN
+        
+        codigos: numpy.ndarray
+           Número del grupo de cada fila, -1 si la fila no tiene grupo
+        
+        n_grupos: int
+           Cantidad de grupos
+        
+        estadistico: str
+           'media', 'mediana', 'moda' o 'media_recortada'
+        
+        recorte: float
+           Proporción de valores que se quita de cada extremo en la media recortada
+    
+        Returns:
+        -------
+        resultado: numpy.ndarray
+           Estadístico de cada grupo, NaN si el grupo no tiene valores no nulos
+        '''
+        validos = ~np.isnan(valores) & (codigos >= 0)
+        v, c = valores[validos], codigos[validos]
+        n = np.bincount(c, minlength = n_grupos)
+        resultado = np.full(n_grupos, np.nan)
+        con_datos = n > 0
+        
+        if estadistico == 'media':
+            resultado[con_datos] = np.bincount(c, weights = v, minlength = n_grupos)[con_datos] / n[con_datos]
+            return resultado
+        
+        orden = np.lexsort((v, c))
+        v, c = v[orden], c[orden]
+        inicios = np.concatenate(([0], np.cumsum(n)[:-1]))
+        
+        if estadistico == 'mediana':
+            bajo = inicios + (n - 1) // 2
+            alto = inicios + n // 2
+            resultado[con_datos] = (v[bajo[con_datos]] + v[alto[con_datos]]) / 2
+            
+        elif estadistico == 'media_recortada':
+            # Como scipy.stats.trim_mean: se quitan int(recorte * n) valores de cada extremo
+            posicion = np.arange(len(v)) - inicios[c]
+            cortes = (recorte * n).astype(np.int64)
+            conservar = (posicion >= cortes[c]) & (posicion < (n - cortes)[c])
+            cuenta = np.bincount(c[conservar], minlength = n_grupos)
+            suma = np.bincount(c[conservar], weights = v[conservar], minlength = n_grupos)
+            resultado[cuenta > 0] = suma[cuenta > 0] / cuenta[cuenta > 0]
+            
+        else:
+            # Moda: la racha más larga de valores iguales dentro de cada grupo, y en empate el menor valor
+            cambios = np.flatnonzero(np.concatenate(([True], (c[1:] != c[:-1]) | (v[1:] != v[:-1]))))
+            largos = np.diff(np.append(cambios, len(v)))
+            rachas = np.lexsort((v[cambios], -largos, c[cambios]))
+            primeras = rachas[np.concatenate(([True], np.diff(c[cambios][rachas]) != 0))]
+            resultado[c[cambios][primeras]] = v[cambios][primeras]
+            
+        return resultado
+
+    def imputar_por_agrupacion(self, columnas = 'Salario base', grupos = ('Género', 'Grado de estudio'), 
+                               estadistico = 'media', respaldo = True, recorte = 0.1):
+        '''
+        Función que imputa valores faltantes de una o varias columnas con un estadístico de su grupo.
+        Por defecto imputa la columna 'Salario base' utilizando el promedio de los valores agrupados por 
+        'Género' y 'Grado de estudio'.
+        
+        Si un grupo no tiene ningún valor no nulo, con respaldo = True se usa el estadístico del grupo 
+        formado por las primeras llaves, quitando una llave a la vez, y al final el de toda la columna. 
+        Las filas con llaves nulas también se imputan con ese respaldo. Los grupos se numeran una sola 
+        vez por nivel y se reutilizan en todas las columnas.
+    
+        Parameters:
+        ----------
+        columnas: str o list
+           Columna o columnas a imputar. Por defecto es 'Salario base'
+        
+        grupos: str o list
+           Columna o columnas que definen los grupos, de la más general a la más específica. 
+           Por defecto son 'Género' y 'Grado de estudio'
+        
+        estadistico: str
+           'media', 'mediana', 'moda' o 'media_recortada'. Por defecto es 'media'
+        
+        respaldo: bool
+           Si es True los grupos sin datos usan los niveles más generales. Por defecto es True; con 
+           False quedan nulos, como antes
+        
+        recorte: float
+           Proporción que se quita de cada extremo en la media recortada. Por defecto es 0.1
     
         Returns:
         -------
         base_salarios: pandas.DataFrame
            DataFrame que contiene los datos del archivo Excel leído, con los valores 
-           faltantes en la columna 'Salario base' imputados por el promedio de los grupos 
-           de 'Género' y 'Grado de estudio'
+           faltantes de las columnas imputados por el estadístico de su grupo
         '''
-        # Llamo al método heredado para leer la base de datos
+        if estadistico not in self.__ESTADISTICOS:
+            raise ValueError(f"El estadístico debe ser uno de {self.__ESTADISTICOS}, no {estadistico}")
+        
         base_salarios = self.__dataframe
-        # Imputación utilizando pandas
-        base_salarios['Salario base'] = base_salarios.groupby(['Género', 'Grado de estudio'])['Salario base'] \
-                               .transform(lambda x: x.fillna(x.mean()))
+        columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+        llaves = [grupos] if isinstance(grupos, str) else list(grupos)
+        
+        # Niveles de agrupación, del más específico al total de la columna
+        niveles = [llaves[:i] for i in range(len(llaves), -1, -1)] if respaldo else [llaves]
+        codigos = []
+        for nivel in niveles:
+            if nivel:
+                # Las filas con alguna llave nula quedan sin grupo, con código -1
+                codigo = base_salarios.groupby(nivel, sort = False).ngroup().fillna(-1).to_numpy(dtype = np.int64)
+            else:
+                codigo = np.zeros(len(base_salarios), dtype = np.int64)
+            codigos.append((codigo, codigo.max() + 1 if len(codigo) else 0))
+        
+        for columna in columnas:
+            valores = base_salarios[columna].to_numpy(dtype = float, na_value = np.nan)
+            nulos = np.isnan(valores)
+            if not nulos.any():
+                continue
+            imputado = valores.copy()
+            
+            for codigo, n_grupos in codigos:
+                estadisticos = self.__estadistico_por_grupo(valores, codigo, n_grupos, estadistico, recorte)
+                relleno = np.where(codigo[nulos] >= 0, estadisticos[np.maximum(codigo[nulos], 0)], np.nan)
+                imputado[nulos] = relleno
+                nulos[nulos] = np.isnan(relleno)
+                if not nulos.any():
+                    break
+            
+            base_salarios[columna] = imputado
+        
+        self.__datos_modificados(columnas)
         
         return base_salarios
 
 #------------------------------------------------------------------------------------------------------- 
 
+#--------------------------------------Procesamiento por bloques---------------------------------------- 
+
+    def __leer_bloques(self, tamano_bloque, plan=None):
+        """
+        Lee el archivo por bloques de filas, sin cargarlo completo en memoria.
+        
+        Parameters
+        ----------
+        tamano_bloque : int
+            Cantidad de filas de cada bloque
+        plan : PlanLimpieza, optional
+            Si se da, solo se leen las columnas que usa el plan y cada bloque se filtra al 
+            leerlo; en parquet el filtro se aplica en Arrow, antes de crear el DataFrame.
+            Por defecto se lee todo
+        
+        Returns
+        -------
+        bloques : generator
+            Generador de tuplas con un DataFrame de tamano_bloque filas como máximo y la 
+            cantidad de filas del archivo que se leyeron para formarlo
+        """
+        extension = os.path.splitext(self.ruta)[1].lower()
+        usecols = None if plan is None else plan.usa_columna
+
+        if extension == '.parquet':
+            archivo = pq.ParquetFile(self.ruta)
+            columnas = None if plan is None else [c for c in archivo.schema_arrow.names if usecols(c)]
+            expresion = pq.filters_to_expression(plan.filtros) if plan is not None and plan.filtros else None
+            for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+                tabla = pa.Table.from_batches([lote])
+                if expresion is not None:
+                    tabla = tabla.filter(expresion)
+                yield tabla.to_pandas(), lote.num_rows
+        elif extension in ('.csv', '.txt'):
+            for bloque in pd.read_csv(self.ruta, usecols=usecols, chunksize=tamano_bloque):
+                filas = len(bloque)
+                if plan is not None:
+                    bloque = bloque[plan.mascara(bloque)]
+                yield bloque, filas
+        else:
+            raise ValueError(f"Solo se pueden leer por bloques archivos csv o parquet, no {extension}")
+
+    @staticmethod
+    def __resumir_bloque(bloque, columna, llaves, estadistico):
+        """
+        Resume los valores no nulos de una columna de un bloque por grupo, para acumular los 
+        resúmenes de todos los bloques sin guardar los datos.
+        
+        Para la media basta la suma y la cantidad de valores de cada grupo. Para los demás 
+        estadísticos se cuenta cuántas veces aparece cada valor en cada grupo, así la memoria 
+        depende de la cantidad de valores distintos y no de la cantidad de filas.
+        
+        Parameters
+        ----------
+        bloque : pandas.DataFrame
+            Bloque de filas
+        columna : str
+            Columna a imputar
+        llaves : list
+            Columnas que definen los grupos
+        estadistico : str
+            'media', 'mediana', 'moda' o 'media_recortada'
+        
+        Returns
+        -------
+        resumen : pandas.DataFrame
+            Con la media, las llaves y las columnas 'suma' y 'cuenta'; con los demás 
+            estadísticos, las llaves, la columna con cada valor y su 'cuenta'
+        """
+        datos = bloque.loc[bloque[columna].notna(), llaves + [columna]]
+        if estadistico == 'media':
+            # Las llaves nulas se conservan porque cuentan en los niveles de respaldo que no las usan
+            return (datos.groupby(llaves, dropna = False, observed = True, sort = False)[columna]
+                    .agg(suma = 'sum', cuenta = 'count').reset_index())
+        return (datos.groupby(llaves + [columna], dropna = False, observed = True, sort = False)
+                .size().rename('cuenta').reset_index())
+
+    @staticmethod
+    def __estadistico_ponderado(resumen, columna, nivel, estadistico, recorte):
+        """
+        Calcula el estadístico de cada grupo de un nivel a partir del resumen acumulado de todos 
+        los bloques, con los mismos criterios que imputar_por_agrupacion.
+        
+        Parameters
+        ----------
+        resumen : pandas.DataFrame
+            Resumen acumulado, como el de __resumir_bloque
+        columna : str
+            Columna a imputar
+        nivel : list
+            Llaves del nivel; si está vacía se calcula el estadístico de toda la columna
+        estadistico : str
+            'media', 'mediana', 'moda' o 'media_recortada'
+        recorte : float
+            Proporción de valores que se quita de cada extremo en la media recortada
+        
+        Returns
+        -------
+        resultado : pandas.Series o float
+            Estadístico de cada grupo, con un MultiIndex de las llaves del nivel, o el 
+            estadístico de toda la columna si el nivel está vacío
+        """
+        if estadistico == 'media':
+            if not nivel:
+                cuenta = resumen['cuenta'].sum()
+                return resumen['suma'].sum() / cuenta if cuenta > 0 else np.nan
+            # Las filas con alguna llave nula del nivel no forman parte de ningún grupo
+            grupos = resumen.groupby(nivel, observed = True)[['suma', 'cuenta']].sum()
+            resultado = grupos['suma'] / grupos['cuenta'].where(grupos['cuenta'] > 0)
+            resultado.index = pd.MultiIndex.from_frame(grupos.index.to_frame())
+            return resultado
+        
+        # Cuentas de cada valor por grupo, ordenadas por grupo y por valor
+        tabla = resumen.groupby(nivel + [columna], observed = True)['cuenta'].sum()
+        tabla = tabla[tabla > 0].reset_index()
+        v = tabla[columna].to_numpy(dtype = float)
+        w = tabla['cuenta'].to_numpy(dtype = float)
+        if nivel:
+            c = tabla.groupby(nivel, sort = False, observed = True).ngroup().to_numpy()
+        else:
+            c = np.zeros(len(tabla), dtype = np.int64)
+        n_grupos = c.max() + 1 if len(c) else 0
+        
+        n = np.bincount(c, weights = w, minlength = n_grupos)
+        acumulado = np.cumsum(w)
+        primeras = np.flatnonzero(np.concatenate(([True], c[1:] != c[:-1]))) if len(c) else c
+        inicio = (acumulado - w)[primeras]
+        resultado = np.full(n_grupos, np.nan)
+        
+        if estadistico == 'mediana':
+            bajo = np.searchsorted(acumulado, inicio + (n - 1) // 2, side = 'right')
+            alto = np.searchsorted(acumulado, inicio + n // 2, side = 'right')
+            resultado = (v[bajo] + v[alto]) / 2
+        elif estadistico == 'media_recortada':
+            # Como scipy.stats.trim_mean: se quitan int(recorte * n) valores de cada extremo
+            cortes = np.floor(recorte * n)
+            desde = acumulado - w - inicio[c]
+            hasta = acumulado - inicio[c]
+            conservados = np.clip(np.minimum(hasta, (n - cortes)[c]) - np.maximum(desde, cortes[c]), 0, None)
+            cuenta = np.bincount(c, weights = conservados, minlength = n_grupos)
+            suma = np.bincount(c, weights = v * conservados, minlength = n_grupos)
+            resultado[cuenta > 0] = suma[cuenta > 0] / cuenta[cuenta > 0]
+        else:
+            # Moda: el valor más frecuente de cada grupo, y en empate el menor valor
+            orden = np.lexsort((v, -w, c))
+            primero = orden[np.concatenate(([True], np.diff(c[orden]) != 0))] if len(c) else orden
+            resultado[c[primero]] = v[primero]
+        
+        if not nivel:
+            return resultado[0] if n_grupos else np.nan
+        claves = tabla[nivel].iloc[primeras]
+        return pd.Series(resultado, index = pd.MultiIndex.from_frame(claves))
+
+    def procesar_por_bloques(self, ruta_salida, etapas=('eliminar_nulos', 'imputar_agrupacion'), porcentaje=0.5, 
+                             columnas='Salario base', grupos=('Género', 'Grado de estudio'), estadistico='media', 
+                             respaldo=True, recorte=0.1, tamano_bloque=100_000):
+        """
+        Aplica limpiar_datos, eliminar_columnas_por_nulos e imputar_por_agrupacion como etapas 
+        de un flujo por bloques, para archivos que no caben en memoria.
+        
+        El archivo se recorre dos veces. En la primera se cuentan los nulos de cada columna, se 
+        acumula un resumen por grupo de las columnas a imputar y se unifican los tipos de las 
+        columnas de todos los bloques; en la segunda se limpia cada bloque, se eliminan las 
+        columnas, se imputan los nulos con los estadísticos globales y el resultado se escribe 
+        al archivo de salida bloque por bloque. En memoria solo hay un bloque y los resúmenes.
+        
+        'limpiar' aplica el plan de limpieza de la base de defunciones, y las opciones de 
+        imputación siguen a imputar_por_agrupacion; se combinan solo si el archivo tiene las 
+        columnas de ambas etapas.
+        
+        Parameters
+        ----------
+        ruta_salida : str
+            Ruta del archivo de salida, en formato parquet o csv según su extensión
+        etapas : tuple, optional
+            Etapas que se aplican, en este orden: 'limpiar', 'eliminar_nulos' e 'imputar_agrupacion'.
+            Por defecto son 'eliminar_nulos' e 'imputar_agrupacion'
+        porcentaje : float, optional
+            Porcentaje máximo de valores nulos de eliminar_columnas_por_nulos. Por defecto es 0.5
+        columnas : str o list, optional
+            Columna o columnas a imputar. Por defecto es 'Salario base'
+        grupos : str o list, optional
+            Columna o columnas que definen los grupos, de la más general a la más específica. 
+            Por defecto son 'Género' y 'Grado de estudio'
+        estadistico : str, optional
+            'media', 'mediana', 'moda' o 'media_recortada'. Por defecto es 'media'
+        respaldo : bool, optional
+            Si es True los grupos sin datos usan los niveles más generales. Por defecto es True
+        recorte : float, optional
+            Proporción que se quita de cada extremo en la media recortada. Por defecto es 0.1
+        tamano_bloque : int, optional
+            Cantidad de filas de cada bloque. Por defecto es 100_000
+        
+        Returns
+        -------
+        resumen : dict
+            Diccionario con las filas leídas, las filas escritas y las columnas eliminadas
+        """
+        if estadistico not in self.__ESTADISTICOS:
+            raise ValueError(f"El estadístico debe ser uno de {self.__ESTADISTICOS}, no {estadistico}")
+        
+        columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+        llaves = [grupos] if isinstance(grupos, str) else list(grupos)
+        niveles = [llaves[:i] for i in range(len(llaves), -1, -1)] if respaldo else [llaves]
+        imputar = 'imputar_agrupacion' in etapas
+        es_parquet = os.path.splitext(ruta_salida)[1].lower() == '.parquet'
+        
+        # Al limpiar, las columnas eliminadas y las filas filtradas no se leen
+        plan = self.__plan if 'limpiar' in etapas else None
+        filas_leidas = 0
+        filas_totales = 0
+        nulos = None
+        resumenes = {}
+        esquema = None
+
+        # Primera pasada: estadísticas y tipos de todos los bloques
+        if 'eliminar_nulos' in etapas or imputar or es_parquet:
+            for bloque, _ in self.__leer_bloques(tamano_bloque, plan):
+                if plan is not None:
+                    # Las filas ya se filtraron al leer el bloque
+                    bloque = self.__limpiar(bloque, plan, filtrar = False)
+                filas_totales += len(bloque)
+                nulos_bloque = bloque.isna().sum()
+                nulos = nulos_bloque if nulos is None else nulos.add(nulos_bloque, fill_value=0)
+                
+                if es_parquet:
+                    # Una columna sin datos en el bloque no define su tipo, se toma el de los demás bloques
+                    esquema_bloque = pa.Schema.from_pandas(bloque, preserve_index = False).remove_metadata()
+                    esquema_bloque = pa.schema([pa.field(campo.name, pa.null()) if nulos_bloque[campo.name] == len(bloque)
+                                                else campo for campo in esquema_bloque])
+                    esquema = esquema_bloque if esquema is None else pa.unify_schemas(
+                        [esquema, esquema_bloque], promote_options = 'permissive')
+
+                if imputar:
+                    faltantes = [c for c in columnas + llaves if c not in bloque.columns]
+                    if faltantes:
+                        raise ValueError(f"El archivo no tiene las columnas de imputar_agrupacion: {faltantes}")
+                    for columna in columnas:
+                        resumen = self.__resumir_bloque(bloque, columna, llaves, estadistico)
+                        if columna in resumenes:
+                            claves = llaves if estadistico == 'media' else llaves + [columna]
+                            resumen = (pd.concat([resumenes[columna], resumen])
+                                       .groupby(claves, dropna = False, observed = True, sort = False)
+                                       .sum().reset_index())
+                        resumenes[columna] = resumen
+
+        eliminadas = []
+        if 'eliminar_nulos' in etapas and nulos is not None:
+            eliminadas = list(nulos.index[nulos > filas_totales * porcentaje])
+
+        # Estadístico de cada nivel de agrupación, del más específico al total de la columna
+        estadisticos = {columna : [(nivel, self.__estadistico_ponderado(resumen, columna, nivel, estadistico, recorte))
+                                   for nivel in niveles if not set(nivel) & set(eliminadas)]
+                        for columna, resumen in resumenes.items() if columna not in eliminadas}
+        
+        if esquema is not None:
+            esquema = pa.schema([pa.field(campo.name, pa.float64()) if campo.name in estadisticos else campo
+                                 for campo in esquema if campo.name not in eliminadas])
+
+        # Segunda pasada: se transforma y escribe cada bloque
+        if os.path.exists(ruta_salida):
+            os.remove(ruta_salida)
+        escritor = None
+        encabezado_escrito = False
+        filas_escritas = 0
+
+        try:
+            for bloque, filas in self.__leer_bloques(tamano_bloque, plan):
+                filas_leidas += filas
+                if plan is not None:
+                    bloque = self.__limpiar(bloque, plan, filtrar = False)
+                bloque = bloque.drop(columns = eliminadas)
+
+                for columna, por_nivel in estadisticos.items():
+                    valores = bloque[columna].astype(float)
+                    for nivel, estadistico_nivel in por_nivel:
+                        if not valores.isna().any():
+                            break
+                        if nivel:
+                            claves = pd.MultiIndex.from_frame(bloque[nivel])
+                            estadistico_nivel = estadistico_nivel.reindex(claves).to_numpy()
+                        valores = valores.fillna(pd.Series(estadistico_nivel, index = valores.index))
+                    bloque[columna] = valores
+
+                if es_parquet:
+                    # Todos los bloques se escriben con los tipos unificados en la primera pasada; las 
+                    # columnas sin datos se pasan como None para que tomen el tipo unificado
+                    vacias = bloque.columns[bloque.isna().all().to_numpy()]
+                    if len(bloque) and len(vacias):
+                        bloque = bloque.assign(**{c : pd.Series(None, index = bloque.index, dtype = object) for c in vacias})
+                    tabla = pa.Table.from_pandas(bloque, schema = esquema, preserve_index = False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(ruta_salida, tabla.schema)
+                    escritor.write_table(tabla)
+                elif len(bloque) or not encabezado_escrito:
+                    # Un bloque vacío solo se escribe si aún falta el encabezado
+                    bloque.to_csv(ruta_salida, mode = 'a', header = not encabezado_escrito, index = False)
+                    encabezado_escrito = True
+                filas_escritas += len(bloque)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        resumen = {
+            'filas_leidas' : filas_leidas,
+            'filas_escritas' : filas_escritas,
+            'columnas_eliminadas' : eliminadas
+        }
+        return resumen
+
+#------------------------------------------------------------------------------------------------------- 
+
+# Los gráficos se dibujan en procesos aparte, por lo que estas funciones deben estar a nivel de 
+# módulo para que joblib las pueda enviar
+def _guardar_figura(fig, ruta):
+    '''
+    Guarda una figura como png en un archivo o en memoria.
+
+    Parameters:
+    ----------
+    fig: matplotlib.figure.Figure
+       Figura dibujada con el backend Agg
+
+    ruta: str
+       Ruta del archivo, o None para devolver los bytes
+
+    Returns:
+    -------
+    grafico: bytes o str
+       Bytes del png, o la ruta del archivo
+    '''
+    if ruta is not None:
+        fig.savefig(ruta, format = 'png', bbox_inches = 'tight')
+        return ruta
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format = 'png', bbox_inches = 'tight')
+    return buffer.getvalue()
+
+def _dibujar_histograma(bordes, conteos, ruta = None, ax = None, **estilo):
+    '''
+    Dibuja un histograma a partir de los bordes y conteos de sus clases.
+
+    Parameters:
+    ----------
+    bordes: numpy.ndarray
+       Bordes de las clases
+
+    conteos: numpy.ndarray
+       Frecuencia de cada clase
+
+    ruta: str
+       Ruta del archivo, o None para devolver los bytes
+
+    ax: matplotlib.axes.Axes
+       Ejes donde se dibuja. Por defecto es None y se crea una figura con el backend Agg
+
+    **estilo: dict
+       Opciones de matplotlib para las barras
+
+    Returns:
+    -------
+    grafico: bytes o str
+       Bytes del png, o la ruta del archivo; None si se dibuja en ax
+    '''
+    fig = None
+    if ax is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+    estilo = {'color' : 'blue', 'edgecolor' : 'black', **estilo}
+    ax.hist(bordes[:-1], bins = bordes, weights = conteos, **estilo)
+    ax.set_xlabel('Valor')
+    ax.set_ylabel('Frecuencia')
+    return None if fig is None else _guardar_figura(fig, ruta)
+
+def _dibujar_barras(categorias, frecuencias, ruta = None, ax = None, **estilo):
+    '''
+    Dibuja un gráfico de barras a partir de las categorías y sus frecuencias.
+
+    Parameters:
+    ----------
+    categorias: numpy.ndarray
+       Nombres de las categorías
+
+    frecuencias: numpy.ndarray
+       Frecuencia de cada categoría
+
+    ruta: str
+       Ruta del archivo, o None para devolver los bytes
+
+    ax: matplotlib.axes.Axes
+       Ejes donde se dibuja. Por defecto es None y se crea una figura con el backend Agg
+
+    **estilo: dict
+       Opciones de matplotlib para las barras
+
+    Returns:
+    -------
+    grafico: bytes o str
+       Bytes del png, o la ruta del archivo; None si se dibuja en ax
+    '''
+    fig = None
+    if ax is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+    estilo = {'color' : 'red', **estilo}
+    ax.bar(categorias, frecuencias, **estilo)
+    ax.set_xlabel('Categorías')
+    ax.set_ylabel('Frecuencia')
+    ax.tick_params(axis = 'x', rotation = 45)
+    return None if fig is None else _guardar_figura(fig, ruta)
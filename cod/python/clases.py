@@ -1,10 +1,14 @@
 
 # Clases
+from Compilacion import Compilacion
+from Escenario import Escenario
+from EstimadorEnLinea import EstimadorEnLinea
 from GenerarDataframes import GenerarDataframes
 from GenerarGraficos import GenerarGraficos
 from Madre import Madre
 from ModeloEstocastico import ModeloEstocastico
 from OperacionesBasicas import OperacionesBasicas
+from PlanLimpieza import PlanLimpieza
 from RegresionLogistica import RegresionLogistica
 import sys
 sys.path.append('cod/python')
@@ -9,10 +9,12 @@ import seaborn as sns
 
 # Librerías menos comunes
 import numexpr as ne
+import pyarrow as pa
 import numba as nb
 from numba import jit, njit, prange
 from joblib import Parallel, delayed
 from sklearn.model_selection import train_test_split
+from scipy.optimize import minimize
 from scipy.stats import norm
 
 
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos del proyecto se importan por nombre desde cod/python, igual que en los cuadernos
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'cod', 'python'))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from EstimadorEnLinea import EstimadorEnLinea
+
+
+@pytest.mark.parametrize('tamanos', [[1000], [1, 999], [7, 130, 1, 500, 362], [250] * 4])
+def test_combinacion_de_chan_coincide_con_numpy(tamanos):
+    rng = np.random.default_rng(0)
+    # Media grande y varianza pequeña, donde la fórmula ingenua pierde precisión
+    muestras = 1e6 + rng.normal(size=(sum(tamanos), 3))
+    estimador = EstimadorEnLinea()
+    inicio = 0
+    for tamano in tamanos:
+        estimador.actualizar(muestras[inicio:inicio + tamano])
+        inicio += tamano
+
+    assert estimador.n == len(muestras)
+    np.testing.assert_allclose(estimador.media, np.mean(muestras, axis=0), rtol=1e-12)
+    np.testing.assert_allclose(estimador.varianza, np.var(muestras, axis=0, ddof=1), rtol=1e-9)
+    np.testing.assert_allclose(estimador.error_estandar, np.std(muestras, axis=0, ddof=1) / np.sqrt(len(muestras)),
+                               rtol=1e-9)
+
+
+def test_lote_vacio_no_cambia_las_estadisticas():
+    estimador = EstimadorEnLinea()
+    estimador.actualizar(np.arange(6.0).reshape(3, 2))
+    estimador.actualizar(np.empty((0, 2)))
+    assert estimador.n == 3
+    np.testing.assert_allclose(estimador.varianza, [4.0, 4.0])
+
+
+def test_reservorio_guarda_muestras_del_flujo():
+    estimador = EstimadorEnLinea(tamano_reservorio=10, semilla=1)
+    muestras = np.arange(200.0).reshape(100, 2)
+    for inicio in range(0, 100, 15):
+        estimador.actualizar(muestras[inicio:inicio + 15])
+    assert estimador.reservorio.shape == (10, 2)
+    assert set(map(tuple, estimador.reservorio)) <= set(map(tuple, muestras))
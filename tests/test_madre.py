@@ -0,0 +1,92 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from Madre import Madre
+
+
+@pytest.fixture
+def ruta_csv(tmp_path):
+    ruta = tmp_path / 'datos.csv'
+    pd.DataFrame({'a' : [1, 2, 3, 4], 'b' : ['x', 'y', None, 'x'], 'c' : [0.5, np.nan, 2.5, 3.5]}).to_csv(ruta, index=False)
+    return str(ruta)
+
+
+def leer_indice(ruta):
+    directorio = os.path.join(os.path.dirname(ruta), '.cache')
+    with open(os.path.join(directorio, f'{os.path.basename(ruta)}.json')) as archivo:
+        return directorio, json.load(archivo)
+
+
+def test_copia_se_reconstruye_si_cambia_el_archivo(ruta_csv):
+    madre = Madre(ruta_csv)
+    assert madre.leer_csv()['a'].tolist() == [1, 2, 3, 4]
+    _, indice = leer_indice(ruta_csv)
+
+    # Mismo tamaño, otro contenido y otra fecha de modificación
+    with open(ruta_csv) as archivo:
+        texto = archivo.read()
+    with open(ruta_csv, 'w') as archivo:
+        archivo.write(texto.replace('1,x', '9,x'))
+    os.utime(ruta_csv, ns=(indice['modificacion'] + 10**9, indice['modificacion'] + 10**9))
+
+    assert madre.leer_csv()['a'].tolist() == [9, 2, 3, 4]
+    _, nuevo = leer_indice(ruta_csv)
+    assert nuevo['hash'] != indice['hash']
+
+
+def test_copia_se_reconstruye_si_cambia_el_tamano(ruta_csv):
+    madre = Madre(ruta_csv)
+    madre.leer_csv()
+    with open(ruta_csv, 'a') as archivo:
+        archivo.write('5,z,4.5\n')
+    assert madre.leer_csv()['a'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_tocar_el_archivo_no_reconstruye_la_copia(ruta_csv):
+    madre = Madre(ruta_csv)
+    madre.leer_csv()
+    directorio, indice = leer_indice(ruta_csv)
+    tabla = os.path.join(directorio, indice['tablas']['0']['archivo'])
+    creada = os.stat(tabla).st_mtime_ns
+
+    os.utime(ruta_csv, ns=(indice['modificacion'] + 10**9, indice['modificacion'] + 10**9))
+    assert madre.leer_csv()['a'].tolist() == [1, 2, 3, 4]
+
+    _, nuevo = leer_indice(ruta_csv)
+    assert nuevo['modificacion'] == indice['modificacion'] + 10**9
+    assert os.stat(tabla).st_mtime_ns == creada
+
+
+def test_copia_fallida_no_deja_un_indice_viejo(ruta_csv):
+    madre = Madre(ruta_csv)
+    madre.leer_csv()
+    with open(ruta_csv) as archivo:
+        original = archivo.read()
+    with open(ruta_csv, 'a') as archivo:
+        archivo.write('1,2,3,4,5,6\n')
+    with pytest.raises(pd.errors.ParserError):
+        madre.leer_csv()
+
+    with open(ruta_csv, 'w') as archivo:
+        archivo.write(original)
+    assert madre.leer_csv()['a'].tolist() == [1, 2, 3, 4]
+
+
+def test_cambios_del_usuario_no_alteran_la_memoria(ruta_csv):
+    madre = Madre(ruta_csv)
+    contenido = madre.leer_csv()
+    contenido.loc[0, 'a'] = -1
+    assert madre.leer_csv()['a'].tolist() == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('filtros', [[('a', '!=', 2)], [('b', '!=', 'x')], [('b', 'not in', ['y'])], 
+                                     [('c', '>', 1)], [('a', '>=', 2), ('b', 'in', ['x', 'y'])]])
+@pytest.mark.parametrize('usecols', [None, ['c'], lambda columna: columna == 'a'])
+def test_filtros_iguales_con_y_sin_copia(ruta_csv, filtros, usecols):
+    madre = Madre(ruta_csv)
+    con_copia = madre.leer_csv(usecols=usecols, filtros=filtros)
+    sin_copia = madre.leer_csv(usecols=usecols, filtros=filtros, cache=False)
+    pd.testing.assert_frame_equal(con_copia.reset_index(drop=True), sin_copia.reset_index(drop=True), 
+                                  check_dtype=False)
@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import pytest
+from conftest import RAIZ
+from Escenario import Escenario
+from ModeloEstocastico import ModeloEstocastico
+
+# Con 4.5 errores estándar la probabilidad de que alguna de las 45 edades falle por azar es 
+# menor a 1 en 3000
+ERRORES_ESTANDAR = 4.5
+
+
+@pytest.fixture(scope='module')
+def modelo():
+    return ModeloEstocastico(os.path.join(RAIZ, 'data', 'Mortalidad_supen.xlsx'), 'Sexo_1_limpio')
+
+
+@pytest.fixture(scope='module')
+def exactas(modelo):
+    return modelo.calcular_primas_exactas()['prima'].to_numpy()
+
+
+def comparar_con_exactas(primas, exactas):
+    media = np.mean(primas, axis=0)
+    error = np.std(primas, axis=0, ddof=1) / np.sqrt(primas.shape[0])
+    assert np.all(np.abs(media - exactas) <= ERRORES_ESTANDAR * error + 1e-12)
+
+
+@pytest.mark.parametrize('metodo, n_escenarios', [('simple', 20_000), ('antitetico', 10_000), 
+                                                  ('control', 20_000), ('sobol', 500)])
+def test_simular_primas_coincide_con_exactas(modelo, exactas, metodo, n_escenarios):
+    primas = modelo.simular_primas(n_escenarios, semilla=11, metodo=metodo)
+    assert primas.shape == (n_escenarios, len(exactas))
+    comparar_con_exactas(primas, exactas)
+
+
+def test_simular_primas_numba_coincide_con_exactas(modelo, exactas):
+    primas = modelo.simular_primas_numba(20_000, semilla=12)
+    comparar_con_exactas(primas, exactas)
+
+
+def test_simular_primas_numba_solo_depende_de_la_semilla(modelo):
+    np.testing.assert_array_equal(modelo.simular_primas_numba(2000, semilla=5, n_hilos=1),
+                                  modelo.simular_primas_numba(2000, semilla=5))
+
+
+def test_control_reduce_la_varianza(modelo):
+    simple = modelo.simular_primas(5000, semilla=3, metodo='simple')
+    control = modelo.simular_primas(5000, semilla=3, metodo='control')
+    assert np.all(np.var(control, axis=0) <= np.var(simple, axis=0) * 1.05)
+
+
+def test_sobol_exige_potencia_de_2(modelo):
+    with pytest.raises(ValueError):
+        modelo.simular_primas(10, metodo='sobol', puntos_sobol=48)
+
+
+def test_barrido_en_serie_y_exacto(modelo, exactas):
+    escenarios = Escenario.rejilla(interes=[0.04, 0.05])
+    df = modelo.barrido_escenarios(escenarios, exacto=True)
+    assert df['escenario'].nunique() == 2
+    np.testing.assert_allclose(df.loc[df['escenario'] == 0, 'prima'], exactas)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from TrabajoDataframes import TrabajoDataframes
+
+
+@pytest.fixture
+def salarios():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        'Género' : rng.choice(['Hombre', 'Mujer'], n),
+        'Grado de estudio' : rng.choice(['Primaria', 'Secundaria', 'Universidad', 'Posgrado'], n),
+        'Salario base' : rng.normal(500_000, 100_000, n).round(),
+        'Bono' : rng.normal(50_000, 5_000, n).round(),
+        'Casi vacía' : np.where(rng.random(n) < 0.8, np.nan, 1.0)
+    })
+    df.loc[rng.random(n) < 0.15, 'Salario base'] = np.nan
+    df.loc[rng.random(n) < 0.10, 'Bono'] = np.nan
+    # Un grupo sin salarios obliga a usar los niveles de respaldo
+    df.loc[(df['Género'] == 'Mujer') & (df['Grado de estudio'] == 'Posgrado'), 'Salario base'] = np.nan
+    return df
+
+
+def en_memoria(df, porcentaje, columnas, estadistico):
+    trabajo = TrabajoDataframes(None)
+    trabajo.dataframe = df
+    trabajo.dataframe = trabajo.eliminar_columnas_por_nulos(porcentaje)
+    return trabajo.imputar_por_agrupacion(columnas=columnas, estadistico=estadistico)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+@pytest.mark.parametrize('estadistico', ['media', 'mediana', 'moda', 'media_recortada'])
+def test_bloques_coincide_con_memoria(tmp_path, salarios, extension, estadistico):
+    entrada = tmp_path / 'salarios.csv'
+    salida = tmp_path / f'salida.{extension}'
+    salarios.to_csv(entrada, index=False)
+    columnas = ['Salario base', 'Bono']
+
+    esperado = en_memoria(salarios, 0.5, columnas, estadistico)
+    resumen = TrabajoDataframes(str(entrada), por_bloques=True).procesar_por_bloques(
+        str(salida), porcentaje=0.5, columnas=columnas, estadistico=estadistico, tamano_bloque=700)
+    obtenido = pd.read_csv(salida) if extension == 'csv' else pd.read_parquet(salida)
+
+    assert resumen == {'filas_leidas' : len(salarios), 'filas_escritas' : len(salarios), 
+                       'columnas_eliminadas' : ['Casi vacía']}
+    assert list(obtenido.columns) == list(esperado.columns)
+    for columna in columnas:
+        assert not obtenido[columna].isna().any()
+        np.testing.assert_allclose(obtenido[columna], esperado[columna])
+    assert (obtenido['Género'] == esperado['Género']).all()
+
+
+def test_bloques_rechaza_columnas_faltantes(tmp_path, salarios):
+    entrada = tmp_path / 'salarios.csv'
+    salarios.to_csv(entrada, index=False)
+    with pytest.raises(ValueError):
+        TrabajoDataframes(str(entrada), por_bloques=True).procesar_por_bloques(
+            str(tmp_path / 'salida.csv'), columnas='No existe')